@@ -4,10 +4,12 @@ import sys
 sys.path.append('.')
 
 from server.app import create_app
+from server.jobs import JobWorkerPool
 
 if __name__ == "__main__":
     import os
 
     app = create_app()
+    JobWorkerPool(app).start()
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port)
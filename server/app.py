@@ -28,7 +28,13 @@ def create_app():
     migrate = Migrate(app, db)
 
     # socketio.init_app(app)
-    socketio.init_app(app, cors_allowed_origins="*")
+    # With a message queue (e.g. redis://) emits from the separate job
+    # worker process reach clients connected to the web process too.
+    socketio.init_app(
+        app,
+        cors_allowed_origins="*",
+        message_queue=app.config["SOCKETIO_MESSAGE_QUEUE"],
+    )
     jwt = JWTManager(app)
 
     from .routes import api_bp
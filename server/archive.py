@@ -0,0 +1,80 @@
+# server/archive.py
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import selectinload
+
+from .models import (
+    db,
+    Order,
+    OrderItem,
+    MpesaTransaction,
+    ArchivedOrder,
+    ArchivedOrderItem,
+    ArchivedMpesaTransaction,
+)
+
+
+ARCHIVABLE_STATUSES = ("Delivered", "Cancelled")
+
+# (live model, archive model, column holding the order id), parents first.
+ARCHIVE_TABLES = (
+    (Order, ArchivedOrder, "id"),
+    (OrderItem, ArchivedOrderItem, "order_id"),
+    (MpesaTransaction, ArchivedMpesaTransaction, "order_id"),
+)
+
+
+def _copy_rows(source, target, order_column, order_ids):
+    columns = [column.name for column in source.__table__.columns]
+    rows = select(*(source.__table__.c[name] for name in columns)).where(
+        source.__table__.c[order_column].in_(order_ids)
+    )
+    db.session.execute(insert(target.__table__).from_select(columns, rows))
+
+
+def archive_batch(cutoff, batch_size):
+    order_ids = db.session.execute(
+        select(Order.id)
+        .where(Order.status.in_(ARCHIVABLE_STATUSES), Order.order_date < cutoff)
+        .order_by(Order.id)
+        .limit(batch_size)
+    ).scalars().all()
+    if not order_ids:
+        return 0
+
+    for source, target, order_column in ARCHIVE_TABLES:
+        _copy_rows(source, target, order_column, order_ids)
+    for source, _, order_column in reversed(ARCHIVE_TABLES):
+        db.session.execute(
+            delete(source.__table__).where(
+                source.__table__.c[order_column].in_(order_ids)
+            )
+        )
+    db.session.commit()
+    return len(order_ids)
+
+
+def archive_orders(days=None, batch_size=None):
+    """
+    Moves delivered and cancelled orders older than `days`, with their items
+    and M-Pesa transactions, into the archive tables. Each batch is its own
+    transaction so the live tables are never locked for long.
+    """
+    days = current_app.config["ARCHIVE_AFTER_DAYS"] if days is None else days
+    batch_size = batch_size or current_app.config["ARCHIVE_BATCH_SIZE"]
+    cutoff = datetime.utcnow() - timedelta(days=days)
+
+    total = 0
+    while True:
+        moved = archive_batch(cutoff, batch_size)
+        total += moved
+        if moved < batch_size:
+            return total
+
+
+def load_archived_order(order_id):
+    return ArchivedOrder.query.options(
+        selectinload(ArchivedOrder.order_items).joinedload(ArchivedOrderItem.menu_item)
+    ).get(order_id)
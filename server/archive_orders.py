@@ -0,0 +1,23 @@
+import sys
+import os
+import argparse
+
+# Add the project directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from server.app import create_app
+from server.archive import archive_orders
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Move old delivered and cancelled orders into the archive tables."
+    )
+    parser.add_argument("--days", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        moved = archive_orders(days=args.days, batch_size=args.batch_size)
+        print(f"Archived {moved} orders")
@@ -0,0 +1,38 @@
+import sys
+import os
+import argparse
+
+# Add the project directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from server.app import create_app, db
+from server.inventory import compact_movements, ledger_drift, open_balances
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fold old inventory movements into the stock snapshots."
+    )
+    parser.add_argument("--days", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument(
+        "--check", action="store_true",
+        help="Don't compact, only list items whose stock disagrees with the ledger",
+    )
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.check:
+            # Rows from before the ledger only agree with it once their
+            # opening balance is recorded.
+            open_balances()
+            db.session.commit()
+        else:
+            folded = compact_movements(days=args.days, batch_size=args.batch_size)
+            print(f"Compacted {folded} inventory movements")
+        drift = ledger_drift()
+        for inventory_id, quantity, ledger_quantity in drift:
+            print(f"Inventory {inventory_id}: quantity {quantity}, ledger says {ledger_quantity}")
+        if drift:
+            sys.exit(1)
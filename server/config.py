@@ -24,3 +24,45 @@ class Config:
     MAIL_USERNAME = os.getenv("MAIL_USERNAME")
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
     MAIL_DEFAULT_SENDER = "noreply@example.com"
+    MENU_CACHE_TTL = int(os.environ.get("MENU_CACHE_TTL", 60))
+    ORDER_FEED_WINDOW = float(os.environ.get("ORDER_FEED_WINDOW", 0.1))
+    STOCK_FEED_WINDOW = float(os.environ.get("STOCK_FEED_WINDOW", 0.5))
+    LOW_STOCK_THRESHOLD = int(os.environ.get("LOW_STOCK_THRESHOLD", 5))
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+    JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 0.5))
+    JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 5))
+    JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", 300))
+    IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", 24 * 60 * 60))
+    IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", 10000))
+    IDEMPOTENCY_PURGE_INTERVAL = int(os.environ.get("IDEMPOTENCY_PURGE_INTERVAL", 600))
+    IDEMPOTENCY_LEASE_SECONDS = int(os.environ.get("IDEMPOTENCY_LEASE_SECONDS", 60))
+    ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", 90))
+    ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", 1000))
+    INVENTORY_COMPACT_AFTER_DAYS = int(os.environ.get("INVENTORY_COMPACT_AFTER_DAYS", 30))
+    INVENTORY_COMPACT_BATCH_SIZE = int(os.environ.get("INVENTORY_COMPACT_BATCH_SIZE", 5000))
+    FORECAST_HISTORY_DAYS = int(os.environ.get("FORECAST_HISTORY_DAYS", 365))
+    FORECAST_WINDOW_DAYS = int(os.environ.get("FORECAST_WINDOW_DAYS", 28))
+    FORECAST_HORIZON_DAYS = int(os.environ.get("FORECAST_HORIZON_DAYS", 7))
+    FORECAST_SAFETY_FACTOR = float(os.environ.get("FORECAST_SAFETY_FACTOR", 1.65))
+    FORECAST_CACHE_TTL = int(os.environ.get("FORECAST_CACHE_TTL", 3600))
+    RESERVATION_OPENING_TIME = os.environ.get("RESERVATION_OPENING_TIME", "08:00")
+    RESERVATION_CLOSING_TIME = os.environ.get("RESERVATION_CLOSING_TIME", "23:00")
+    RESERVATION_SLOT_MINUTES = int(os.environ.get("RESERVATION_SLOT_MINUTES", 30))
+    RESERVATION_DURATION_MINUTES = int(os.environ.get("RESERVATION_DURATION_MINUTES", 90))
+    RESERVATION_MAX_DURATION_MINUTES = int(os.environ.get("RESERVATION_MAX_DURATION_MINUTES", 240))
+    RESERVATION_CACHE_TTL = int(os.environ.get("RESERVATION_CACHE_TTL", 30))
+    # Layout for a branch with no dining tables configured.
+    RESERVATION_DEFAULT_TABLES = int(os.environ.get("RESERVATION_DEFAULT_TABLES", 20))
+    RESERVATION_DEFAULT_TABLE_SEATS = int(os.environ.get("RESERVATION_DEFAULT_TABLE_SEATS", 4))
+    RESERVATION_PRICING_TTL = int(os.environ.get("RESERVATION_PRICING_TTL", 300))
+    MPESA_TOKEN_REFRESH_MARGIN = int(os.environ.get("MPESA_TOKEN_REFRESH_MARGIN", 60))
+    MPESA_BASE_URL = os.environ.get("MPESA_BASE_URL", "https://sandbox.safaricom.co.ke")
+    MPESA_CONNECT_TIMEOUT = float(os.environ.get("MPESA_CONNECT_TIMEOUT", 3.05))
+    MPESA_READ_TIMEOUT = float(os.environ.get("MPESA_READ_TIMEOUT", 15))
+    MPESA_POOL_SIZE = int(os.environ.get("MPESA_POOL_SIZE", 10))
+    MPESA_MAX_RETRIES = int(os.environ.get("MPESA_MAX_RETRIES", 2))
+    MPESA_RETRY_BACKOFF = float(os.environ.get("MPESA_RETRY_BACKOFF", 0.25))
+    MPESA_RETRY_BACKOFF_CAP = float(os.environ.get("MPESA_RETRY_BACKOFF_CAP", 2))
+    MPESA_BREAKER_THRESHOLD = int(os.environ.get("MPESA_BREAKER_THRESHOLD", 5))
+    MPESA_BREAKER_RESET_SECONDS = int(os.environ.get("MPESA_BREAKER_RESET_SECONDS", 30))
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get("SOCKETIO_MESSAGE_QUEUE")
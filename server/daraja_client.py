@@ -0,0 +1,159 @@
+# server/daraja_client.py
+import logging
+import random
+import threading
+import time
+
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+
+
+class DarajaUnavailable(requests.RequestException):
+    """Raised without a network call while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and fails fast for
+    `reset_after` seconds. Then a single trial call is let through: success
+    closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, threshold, reset_after):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_after:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.threshold:
+                if self._opened_at is None or self._trial_running:
+                    logging.warning("Daraja circuit breaker opened")
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class DarajaClient:
+    """
+    Shared HTTP client for Daraja. One pooled keep-alive Session per app,
+    connect/read timeouts on every call, bounded retries with full-jitter
+    exponential backoff, and a circuit breaker in front of it all.
+
+    Only idempotent calls are retried after the request may have reached
+    Daraja; anything else is retried only when the connection was never
+    made, so an STK push is never sent twice.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, config):
+        self.base_url = config["MPESA_BASE_URL"].rstrip("/")
+        self.timeout = (config["MPESA_CONNECT_TIMEOUT"], config["MPESA_READ_TIMEOUT"])
+        self.max_retries = config["MPESA_MAX_RETRIES"]
+        self.backoff = config["MPESA_RETRY_BACKOFF"]
+        self.backoff_cap = config["MPESA_RETRY_BACKOFF_CAP"]
+        self.breaker = CircuitBreaker(
+            config["MPESA_BREAKER_THRESHOLD"], config["MPESA_BREAKER_RESET_SECONDS"]
+        )
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=config["MPESA_POOL_SIZE"], max_retries=0
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, idempotent=True, **kwargs)
+
+    def post(self, path, idempotent=False, **kwargs):
+        return self.request("POST", path, idempotent=idempotent, **kwargs)
+
+    def request(self, method, path, idempotent, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise DarajaUnavailable(f"Daraja circuit breaker is open, skipped {method} {path}")
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.ConnectionError as e:
+                self.breaker.record_failure()
+                # A connect timeout means nothing was sent, so any call may retry.
+                retryable = idempotent or isinstance(e, requests.ConnectTimeout)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                error = e
+            except requests.Timeout:
+                self.breaker.record_failure()
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                error = "read timeout"
+            except Exception:
+                # Anything else (a dropped chunked body, a bad URL, ...) still
+                # ends the call, and a half-open trial must not stay running.
+                self.breaker.record_failure()
+                raise
+            else:
+                if response.status_code < 500:
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+                retryable = idempotent and response.status_code in self.RETRY_STATUSES
+                if not retryable or attempt >= self.max_retries:
+                    return response
+                error = f"HTTP {response.status_code}"
+
+            attempt += 1
+            delay = random.uniform(0, min(self.backoff_cap, self.backoff * 2 ** attempt))
+            logging.warning(
+                f"Daraja {method} {path} failed ({error}), retry {attempt} in {delay:.2f}s"
+            )
+            time.sleep(delay)
+
+
+_client_lock = threading.Lock()
+
+
+def get_daraja_client():
+    client = current_app.extensions.get("daraja")
+    if client is None:
+        with _client_lock:
+            client = current_app.extensions.get("daraja")
+            if client is None:
+                client = current_app.extensions["daraja"] = DarajaClient(current_app.config)
+    return client
@@ -0,0 +1,139 @@
+import argparse
+import itertools
+import random
+import secrets
+import threading
+import time
+from datetime import datetime
+
+import requests
+from flask import Flask, jsonify, request
+
+
+def create_stub(latency=0.0, jitter=0.0, error_rate=0.0, hang_rate=0.0, hang=30.0,
+                callback_delay=1.0, callbacks=True):
+    """
+    Local stand-in for the Daraja endpoints the app calls, for offline load
+    tests. Latencies are in seconds. Point MPESA_BASE_URL at it.
+    """
+    app = Flask("daraja_stub")
+    tokens = set()
+    counter = itertools.count(1)
+
+    @app.before_request
+    def misbehave():
+        roll = random.random()
+        if roll < hang_rate:
+            time.sleep(hang)
+        elif roll < hang_rate + error_rate:
+            time.sleep(max(random.gauss(latency, jitter), 0))
+            return jsonify(
+                {"errorCode": "500.001.1001", "errorMessage": "Simulated Daraja failure"}
+            ), 500
+        time.sleep(max(random.gauss(latency, jitter), 0))
+
+    def authorized():
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        return scheme == "Bearer" and token in tokens
+
+    @app.get("/oauth/v1/generate")
+    def generate_token():
+        if not request.headers.get("Authorization", "").startswith("Basic "):
+            return jsonify({"errorMessage": "Invalid Authentication passed"}), 400
+        token = secrets.token_urlsafe(24)
+        tokens.add(token)
+        return jsonify({"access_token": token, "expires_in": "3599"})
+
+    @app.post("/mpesa/stkpush/v1/processrequest")
+    def stk_push():
+        if not authorized():
+            return jsonify({"errorMessage": "Invalid Access Token"}), 401
+        payload = request.get_json(silent=True) or {}
+        number = next(counter)
+        response = {
+            "MerchantRequestID": f"STUB-MR-{number}",
+            "CheckoutRequestID": f"ws_CO_STUB_{number}",
+            "ResponseCode": "0",
+            "ResponseDescription": "Success. Request accepted for processing",
+            "CustomerMessage": "Success. Request accepted for processing",
+        }
+        if callbacks and payload.get("CallBackURL"):
+            threading.Thread(
+                target=send_callback, args=(payload, response, number), daemon=True
+            ).start()
+        return jsonify(response)
+
+    @app.post("/mpesa/reversal/v1/request")
+    def reversal():
+        if not authorized():
+            return jsonify({"errorMessage": "Invalid Access Token"}), 401
+        number = next(counter)
+        return jsonify({
+            "OriginatorConversationID": f"STUB-OC-{number}",
+            "ConversationID": f"AG_STUB_{number}",
+            "ResponseCode": "0",
+            "ResponseDescription": "Accept the service request successfully.",
+        })
+
+    def send_callback(payload, response, number):
+        time.sleep(callback_delay)
+        body = {
+            "Body": {
+                "stkCallback": {
+                    "MerchantRequestID": response["MerchantRequestID"],
+                    "CheckoutRequestID": response["CheckoutRequestID"],
+                    "ResultCode": 0,
+                    "ResultDesc": "The service request is processed successfully.",
+                    "CallbackMetadata": {
+                        "Item": [
+                            {"Name": "Amount", "Value": payload.get("Amount")},
+                            {"Name": "MpesaReceiptNumber", "Value": f"STUB{number:06d}"},
+                            {
+                                "Name": "TransactionDate",
+                                "Value": datetime.now().strftime("%Y%m%d%H%M%S"),
+                            },
+                            {"Name": "PhoneNumber", "Value": payload.get("PhoneNumber")},
+                        ]
+                    },
+                }
+            }
+        }
+        try:
+            requests.post(
+                payload["CallBackURL"],
+                params={"order_id": payload.get("AccountReference")},
+                json=body,
+                timeout=10,
+            )
+        except requests.RequestException as e:
+            app.logger.warning(f"Callback to {payload['CallBackURL']} failed: {e}")
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a local Daraja stand-in with configurable latency and errors."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--latency", type=float, default=200, help="Mean latency in ms")
+    parser.add_argument("--jitter", type=float, default=50, help="Latency std dev in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 500 responses")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Share of calls that hang")
+    parser.add_argument("--hang", type=float, default=30, help="Seconds a hung call sleeps")
+    parser.add_argument("--callback-delay", type=float, default=1.0, help="Seconds before the STK callback")
+    parser.add_argument("--no-callbacks", action="store_true")
+    args = parser.parse_args()
+
+    stub = create_stub(
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        hang_rate=args.hang_rate,
+        hang=args.hang,
+        callback_delay=args.callback_delay,
+        callbacks=not args.no_callbacks,
+    )
+    print(f"Daraja stub listening; set MPESA_BASE_URL=http://{args.host}:{args.port}")
+    stub.run(host=args.host, port=args.port, threaded=True)
@@ -0,0 +1,198 @@
+# server/forecast.py
+import math
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import func, select, union_all
+
+from .models import (
+    db,
+    Inventory,
+    MenuItem,
+    Order,
+    OrderItem,
+    ArchivedOrder,
+    ArchivedOrderItem,
+)
+
+
+EXCLUDED_STATUSES = ("Cancelled", "Payment Failed")
+
+
+def _order_lines(order_model, item_model, since):
+    return (
+        select(
+            MenuItem.inventory_id.label("inventory_id"),
+            func.date(order_model.order_date).label("day"),
+            item_model.quantity.label("quantity"),
+        )
+        .join(order_model, order_model.id == item_model.order_id)
+        .join(MenuItem, MenuItem.id == item_model.menu_item_id)
+        .where(
+            order_model.order_date >= since,
+            order_model.status.notin_(EXCLUDED_STATUSES),
+            MenuItem.inventory_id.isnot(None),
+        )
+    )
+
+
+def daily_demand(start, end):
+    """
+    Returns (inventory_ids, matrix) where matrix[i, d] is the quantity of
+    inventory_ids[i] sold on start + d days, for every day before `end`.
+    Live and archived orders are summed by one aggregate query whose rows
+    are streamed rather than loaded at once.
+    """
+    lines = union_all(
+        _order_lines(Order, OrderItem, start),
+        _order_lines(ArchivedOrder, ArchivedOrderItem, start),
+    ).subquery()
+    # Plain Core rows on a streaming cursor; ORM row processing would cost
+    # more than the aggregate itself. The option sits on the statement, as
+    # setting it on the session's connection would stream every later query.
+    rows = db.session.connection().execute(
+        select(lines.c.inventory_id, lines.c.day, func.sum(lines.c.quantity))
+        .group_by(lines.c.inventory_id, lines.c.day)
+        .execution_options(yield_per=10000)
+    )
+
+    inventory_ids, days, quantities = [], [], []
+    for partition in rows.partitions():
+        partition_ids, partition_days, partition_quantities = zip(*partition)
+        inventory_ids.extend(partition_ids)
+        days.extend(partition_days)
+        quantities.extend(partition_quantities)
+
+    n_days = (end - start).days
+    if not inventory_ids:
+        return np.empty(0, dtype=np.int64), np.zeros((0, n_days))
+
+    ids, rows_index = np.unique(np.array(inventory_ids, dtype=np.int64), return_inverse=True)
+    # SQLite hands back the day as text and PostgreSQL as a date; numpy
+    # parses both.
+    day_index = (
+        np.array(days, dtype="datetime64[D]")
+        - np.datetime64(start, "D")
+    ).astype(np.int64)
+    in_range = (day_index >= 0) & (day_index < n_days)
+
+    matrix = np.zeros((len(ids), n_days))
+    np.add.at(
+        matrix,
+        (rows_index.ravel()[in_range], day_index[in_range]),
+        np.array(quantities, dtype=np.float64)[in_range],
+    )
+    return ids, matrix
+
+
+class DemandCache:
+    """
+    Keeps the last demand matrix. The history ends before today, so it only
+    changes when the day rolls over or an old order is cancelled; the TTL
+    bounds how long the latter goes unnoticed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entry = None
+
+    def get(self, start, end):
+        ttl = current_app.config["FORECAST_CACHE_TTL"]
+        with self._lock:
+            entry = self._entry
+            if entry and entry[0] == (start, end) and time.monotonic() - entry[1] < ttl:
+                return entry[2]
+            # Holding the lock while querying keeps concurrent requests from
+            # all running the same aggregate.
+            demand = daily_demand(start, end)
+            self._entry = ((start, end), time.monotonic(), demand)
+            return demand
+
+
+demand_cache = DemandCache()
+
+
+def weekdays(start, n_days):
+    """Monday-based weekday (0-6) of each of the n_days from start."""
+    epoch_days = np.datetime64(start, "D").astype(np.int64) + np.arange(n_days)
+    # 1970-01-01 was a Thursday.
+    return (epoch_days + 3) % 7
+
+
+def forecast_demand(matrix, start, horizon, window):
+    """
+    Projects demand over the `horizon` days following the history in
+    `matrix`: the trailing `window`-day average scaled by each item's
+    weekday seasonality. Returns (average, forecast, daily_std) arrays.
+    """
+    n_days = matrix.shape[1]
+    recent = matrix[:, -window:]
+    average = recent.mean(axis=1)
+    daily_std = recent.std(axis=1)
+
+    history_weekdays = weekdays(start, n_days)
+    one_hot = np.eye(7)[history_weekdays]
+    weekday_counts = one_hot.sum(axis=0)
+    weekday_means = (matrix @ one_hot) / np.maximum(weekday_counts, 1)
+    overall = matrix.mean(axis=1, keepdims=True)
+    seasonality = np.divide(
+        weekday_means, overall, out=np.ones_like(weekday_means), where=overall > 0
+    )
+
+    future_weekdays = weekdays(start + timedelta(days=n_days), horizon)
+    forecast = average * seasonality[:, future_weekdays].sum(axis=1)
+    return average, forecast, daily_std
+
+
+def reorder_suggestions(horizon=None, window=None, history_days=None):
+    """
+    Forecasts demand for every inventory row sold in the last `history_days`
+    and suggests how much to reorder to cover the horizon plus safety stock.
+    """
+    config = current_app.config
+    horizon = horizon or config["FORECAST_HORIZON_DAYS"]
+    window = window or config["FORECAST_WINDOW_DAYS"]
+    history_days = history_days or config["FORECAST_HISTORY_DAYS"]
+
+    end = date.today()
+    start = end - timedelta(days=history_days)
+    ids, matrix = demand_cache.get(start, end)
+    if not len(ids):
+        return []
+
+    average, forecast, daily_std = forecast_demand(
+        matrix, start, horizon, min(window, history_days)
+    )
+    safety_stock = config["FORECAST_SAFETY_FACTOR"] * daily_std * math.sqrt(horizon)
+
+    inventory = {
+        row.id: row
+        for row in db.session.query(
+            Inventory.id, Inventory.item_name, Inventory.quantity
+        ).filter(Inventory.id.in_(ids.tolist()))
+    }
+    on_hand = np.array(
+        [
+            inventory[inventory_id].quantity if inventory_id in inventory else 0
+            for inventory_id in ids.tolist()
+        ]
+    )
+    reorder = np.maximum(np.ceil(forecast + safety_stock - on_hand), 0).astype(np.int64)
+
+    order = np.lexsort((ids, -reorder))
+    return [
+        {
+            "inventory_id": int(ids[i]),
+            "item_name": inventory[int(ids[i])].item_name,
+            "quantity": int(on_hand[i]),
+            "average_daily_demand": round(float(average[i]), 2),
+            "forecast": round(float(forecast[i]), 2),
+            "safety_stock": round(float(safety_stock[i]), 2),
+            "suggested_reorder": int(reorder[i]),
+        }
+        for i in order
+        if int(ids[i]) in inventory
+    ]
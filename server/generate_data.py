@@ -0,0 +1,295 @@
+import sys
+import os
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, time as dt_time
+from decimal import Decimal
+
+# Add the project directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func, insert, text
+
+from server.app import create_app
+from server.menu_sync import next_menu_version
+from server.models import (
+    db,
+    User,
+    Branch,
+    Inventory,
+    MenuItem,
+    Order,
+    OrderItem,
+    Reservation,
+    DiningTable,
+    MpesaTransaction,
+)
+
+from faker import Faker
+
+
+categories = ['Lobster', 'Octopus', 'Prawn', 'Crab', 'Shrimp', 'Fin Fish']
+styles = ['Grilled', 'Fried', 'Steamed', 'Coconut', 'Swahili', 'Pili Pili', 'Garlic', 'Masala']
+sides = ['with Ugali', 'with Chips', 'with Rice', 'with Chapati', 'Platter', 'Curry']
+order_statuses = ['Delivered'] * 8 + ['Cancelled', 'Pending', 'Paid', 'Preparing']
+table_layouts = [(2, 'standard'), (2, 'outdoor'), (4, 'standard'), (4, 'booth'), (6, 'standard'), (8, 'vip')]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Generate a production-sized synthetic dataset for load testing."
+    )
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--branches", type=int, default=10)
+    parser.add_argument("--menu-items", type=int, default=2000)
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--max-items-per-order", type=int, default=4)
+    parser.add_argument("--reservations", type=int, default=2000)
+    parser.add_argument("--tables", type=int, default=30, help="Tables per branch")
+    parser.add_argument("--days", type=int, default=365, help="Days of order history")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+class BulkWriter:
+    """
+    Buffers rows per table and writes them as one executemany INSERT per
+    table and a commit whenever a buffer fills, so memory stays bounded at
+    any scale. Buffers flush in the order their tables were first used,
+    which keeps parents ahead of the rows referencing them.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.counts = {}
+
+    def add(self, model, row):
+        buffer = self.buffers.setdefault(model, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for model, buffer in self.buffers.items():
+            if not buffer:
+                continue
+            db.session.execute(insert(model.__table__), buffer)
+            self.counts[model.__tablename__] = (
+                self.counts.get(model.__tablename__, 0) + len(buffer)
+            )
+            buffer.clear()
+        db.session.commit()
+
+
+def next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def generate(args):
+    rng = random.Random(args.seed)
+    fake = Faker()
+    Faker.seed(args.seed)
+    first_names = [fake.first_name() for _ in range(500)]
+    last_names = [fake.last_name() for _ in range(500)]
+    now = datetime.utcnow().replace(microsecond=0)
+
+    writer = BulkWriter(args.batch_size)
+
+    user_start = next_id(User)
+    for user_id in range(user_start, user_start + args.users):
+        writer.add(User, {
+            "id": user_id,
+            "firstname": rng.choice(first_names),
+            "lastname": rng.choice(last_names),
+            "email": f"user{user_id}@example.com",
+            "password": "password123",
+            "phone_number": f"2547{user_id:08d}",
+            "role": "customer",
+        })
+    writer.flush()
+    user_ids = (user_start, user_start + args.users - 1)
+
+    branch_start = next_id(Branch)
+    for branch_id in range(branch_start, branch_start + args.branches):
+        writer.add(Branch, {
+            "id": branch_id,
+            "name": f"Bahari Bites {branch_id}",
+            "location": fake.city(),
+            "operating_hours": "08:00-23:00",
+            "contact_number": f"2547{branch_id:08d}",
+            "latitude": rng.uniform(-4.1, -1.2),
+            "longitude": rng.uniform(36.7, 39.7),
+        })
+    writer.flush()
+    branch_ids = list(range(branch_start, branch_start + args.branches))
+
+    table_id = next_id(DiningTable)
+    for branch_id in branch_ids:
+        for table_number in range(1, args.tables + 1):
+            seats, table_type = rng.choice(table_layouts)
+            writer.add(DiningTable, {
+                "id": table_id,
+                "branch_id": branch_id,
+                "table_number": table_number,
+                "seats": seats,
+                "table_type": table_type,
+            })
+            table_id += 1
+    writer.flush()
+
+    # Each menu item gets its own inventory row.
+    menu_version = next_menu_version(db.session.connection())
+    menu_start = next_id(MenuItem)
+    inventory_start = next_id(Inventory)
+    prices = {}
+    branches = {}
+    for offset in range(args.menu_items):
+        menu_item_id = menu_start + offset
+        inventory_id = inventory_start + offset
+        category = rng.choice(categories)
+        name = f"{rng.choice(styles)} {category} {rng.choice(sides)}"
+        price = Decimal(rng.randint(50, 2000))
+        prices[menu_item_id] = price
+        branches[menu_item_id] = rng.choice(branch_ids) if branch_ids else None
+        # Opening stock is written as already compacted, with no movements.
+        quantity = rng.randint(0, 500)
+        writer.add(Inventory, {
+            "id": inventory_id,
+            "item_name": name,
+            "quantity": quantity,
+            "compacted_quantity": quantity,
+            "compacted_through": 0,
+        })
+        writer.add(MenuItem, {
+            "id": menu_item_id,
+            "name": name,
+            "description": f"{name} prepared fresh daily",
+            "category": category,
+            "rating": rng.randint(1, 5),
+            "price": price,
+            "image_url": None,
+            "inventory_id": inventory_id,
+            "branch_id": branches[menu_item_id],
+            "version": menu_version,
+        })
+    writer.flush()
+    menu_ids = (menu_start, menu_start + args.menu_items - 1)
+
+    order_start = next_id(Order)
+    order_item_id = next_id(OrderItem)
+    transaction_id = next_id(MpesaTransaction)
+    history = timedelta(days=args.days).total_seconds()
+    for order_id in range(order_start, order_start + args.orders):
+        order_date = now - timedelta(seconds=rng.uniform(0, history))
+        status = rng.choice(order_statuses)
+        phone_number = f"2547{order_id:08d}"
+        lines = []
+        for _ in range(rng.randint(1, args.max_items_per_order)):
+            menu_item_id = rng.randint(*menu_ids)
+            quantity = rng.randint(1, 5)
+            lines.append({
+                "id": order_item_id,
+                "order_id": order_id,
+                "menu_item_id": menu_item_id,
+                "quantity": quantity,
+                "unit_price": prices[menu_item_id],
+                "line_total": prices[menu_item_id] * quantity,
+            })
+            order_item_id += 1
+        total = sum(line["line_total"] for line in lines)
+        writer.add(Order, {
+            "branch_id": branches[lines[0]["menu_item_id"]],
+            "id": order_id,
+            "user_id_order": rng.randint(*user_ids),
+            "order_date": order_date,
+            "status": status,
+            "phone_number": phone_number,
+            "total_amount": total,
+        })
+        for line in lines:
+            writer.add(OrderItem, line)
+        if status != "Pending":
+            writer.add(MpesaTransaction, {
+                "id": transaction_id,
+                "merchant_request_id": f"MR{transaction_id}",
+                "checkout_request_id": f"CR{transaction_id}",
+                "result_code": 0,
+                "result_description": "The service request is processed successfully.",
+                "amount": total,
+                "mpesa_receipt_number": f"RC{transaction_id:010d}",
+                "transaction_date": order_date,
+                "phone_number": phone_number,
+                "order_id": order_id,
+                "reservation_id": None,
+            })
+            transaction_id += 1
+    writer.flush()
+
+    # Reservations last three half-hour slots and never overlap on a table.
+    reservation_start = next_id(Reservation)
+    booked = set()
+    for reservation_id in range(reservation_start, reservation_start + args.reservations):
+        while True:
+            day = now.date() + timedelta(days=rng.randint(-args.days, 30))
+            slot_index = rng.randint(16, 43)
+            branch_id = rng.choice(branch_ids) if branch_ids else None
+            table_number = rng.randint(1, args.tables)
+            stay = {(branch_id, table_number, day, slot_index + i) for i in range(3)}
+            if not stay & booked:
+                booked |= stay
+                break
+        slot = dt_time(hour=slot_index // 2, minute=30 * (slot_index % 2))
+        starts_at = datetime.combine(day, slot)
+        phone_number = f"2547{reservation_id:08d}"
+        writer.add(Reservation, {
+            "id": reservation_id,
+            "user_id_reservation": rng.randint(*user_ids),
+            "reservation_date": starts_at,
+            "reservation_time": slot,
+            "ends_at": starts_at + timedelta(minutes=90),
+            "duration_minutes": 90,
+            "party_size": 2,
+            "branch_id": branch_id,
+            "table_number": table_number,
+            "phone_number": phone_number,
+            "status": "Confirmed",
+        })
+        writer.add(MpesaTransaction, {
+            "id": transaction_id,
+            "merchant_request_id": f"MR{transaction_id}",
+            "checkout_request_id": f"CR{transaction_id}",
+            "result_code": 0,
+            "result_description": "The service request is processed successfully.",
+            "amount": Decimal(rng.randint(1, 3)),
+            "mpesa_receipt_number": f"RC{transaction_id:010d}",
+            "transaction_date": starts_at,
+            "phone_number": phone_number,
+            "order_id": None,
+            "reservation_id": reservation_id,
+        })
+        transaction_id += 1
+    writer.flush()
+
+    return writer.counts
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        if db.engine.dialect.name == "sqlite":
+            # Durability isn't needed for throwaway load-test data.
+            db.session.execute(text("PRAGMA synchronous = OFF"))
+
+        started = time.perf_counter()
+        counts = generate(args)
+        elapsed = time.perf_counter() - started
+
+        for table, count in counts.items():
+            print(f"Inserted {count} rows into {table}")
+        print('\033[92m' f"Completed data generation in {elapsed:.1f}s")
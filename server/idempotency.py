@@ -0,0 +1,178 @@
+# server/idempotency.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import and_, delete, or_
+
+from .models import db, IdempotencyKey
+from .utils import dialect_insert
+
+
+class ResponseCache:
+    """
+    Small thread-safe LRU of completed responses, keyed by (scope, key),
+    sitting in front of the idempotency_key table.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, cache_key):
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            if entry["expires_at"] < datetime.utcnow():
+                del self._entries[cache_key]
+                return None
+            self._entries.move_to_end(cache_key)
+            return entry
+
+    def put(self, cache_key, entry):
+        capacity = current_app.config["IDEMPOTENCY_CACHE_SIZE"]
+        with self._lock:
+            self._entries[cache_key] = entry
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > capacity:
+                self._entries.popitem(last=False)
+
+
+response_cache = ResponseCache()
+_last_purge = 0.0
+
+
+def purge_expired_keys():
+    global _last_purge
+    now = time.monotonic()
+    if now - _last_purge < current_app.config["IDEMPOTENCY_PURGE_INTERVAL"]:
+        return
+    _last_purge = now
+    db.session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.utcnow())
+    )
+    db.session.commit()
+
+
+def _replay(entry, request_hash):
+    if entry["request_hash"] != request_hash:
+        return {
+            "message": "Idempotency-Key was already used with a different request"
+        }, 422
+    return entry["response"], entry["status_code"], {"Idempotent-Replayed": "true"}
+
+
+def idempotent(func):
+    """
+    Replays the stored response when a request repeats an Idempotency-Key,
+    so retried checkouts don't create new records or re-run payments and
+    notifications. Must sit below @jwt_required(); keys are per user and
+    endpoint.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return func(*args, **kwargs)
+
+        scope = f"{get_jwt_identity()}:{request.method}:{request.path}"
+        cache_key = (scope, key)
+        request_hash = hashlib.sha256(request.get_data()).hexdigest()
+
+        entry = response_cache.get(cache_key)
+        if entry:
+            return _replay(entry, request_hash)
+
+        purge_expired_keys()
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=current_app.config["IDEMPOTENCY_TTL"])
+        locked_until = now + timedelta(
+            seconds=current_app.config["IDEMPOTENCY_LEASE_SECONDS"]
+        )
+        # Claim the key before doing any work so a concurrent retry finds it.
+        # A row that expired but wasn't purged yet, or a claim whose lease
+        # ran out without a response (the worker died), is taken over.
+        stmt = dialect_insert(IdempotencyKey).values(
+            scope=scope,
+            key=key,
+            request_hash=request_hash,
+            expires_at=expires_at,
+            locked_until=locked_until,
+        )
+        table = IdempotencyKey.__table__
+        claimed = db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["scope", "key"],
+                set_={
+                    "request_hash": stmt.excluded.request_hash,
+                    "status_code": None,
+                    "response": None,
+                    "expires_at": stmt.excluded.expires_at,
+                    "locked_until": stmt.excluded.locked_until,
+                },
+                where=or_(
+                    table.c.expires_at < now,
+                    and_(table.c.status_code.is_(None), table.c.locked_until < now),
+                ),
+            )
+        ).rowcount
+        db.session.commit()
+
+        if not claimed:
+            record = IdempotencyKey.query.filter_by(scope=scope, key=key).first()
+            if record is None or record.status_code is None:
+                return {"message": "A request with this Idempotency-Key is in progress"}, 409
+            entry = {
+                "request_hash": record.request_hash,
+                "response": record.response,
+                "status_code": record.status_code,
+                "expires_at": record.expires_at,
+            }
+            response_cache.put(cache_key, entry)
+            return _replay(entry, request_hash)
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            db.session.rollback()
+            _release(scope, key, locked_until)
+            raise
+
+        body, status_code = (result[0], result[1]) if isinstance(result, tuple) else (result, 200)
+        if not isinstance(body, dict) or status_code >= 500:
+            # Only JSON outcomes can be replayed; anything else may be retried.
+            _release(scope, key, locked_until)
+            return result
+
+        # The lease doubles as the claim token, so a request that outlived
+        # its lease can't overwrite the claim that took over from it.
+        IdempotencyKey.query.filter_by(
+            scope=scope, key=key, locked_until=locked_until
+        ).update({"status_code": status_code, "response": body, "locked_until": None})
+        db.session.commit()
+        response_cache.put(
+            cache_key,
+            {
+                "request_hash": request_hash,
+                "response": body,
+                "status_code": status_code,
+                "expires_at": expires_at,
+            },
+        )
+        return result
+
+    return wrapper
+
+
+def _release(scope, key, locked_until):
+    IdempotencyKey.query.filter_by(
+        scope=scope, key=key, locked_until=locked_until
+    ).delete()
+    db.session.commit()
@@ -0,0 +1,347 @@
+# server/inventory.py
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app, request
+from flask_socketio import join_room, leave_room
+from sqlalchemy import Integer, and_, bindparam, delete, func, insert, literal, select, update
+
+from .app import socketio
+from .models import db, Inventory, InventoryMovement, MenuItem, OrderItem
+from .order_feed import branch_room
+
+
+class OutOfStock(Exception):
+    def __init__(self, inventory_ids):
+        super().__init__(f"Not enough stock for inventory items {inventory_ids}")
+        self.inventory_ids = inventory_ids
+
+
+# Reasons staff may record by hand; orders write "order" and "order_cancelled".
+ADJUSTMENT_REASONS = ("adjustment", "stocktake", "restock", "waste")
+
+
+def _adjust_order_stock(order_filter, sign, reason):
+    """
+    Moves stock for every line of the matching orders: one INSERT ... SELECT
+    appends a movement per (inventory row, order) to the ledger, then one
+    correlated UPDATE ... RETURNING applies the summed quantities to the
+    snapshot, whatever the number of lines.
+    """
+    line_filter = and_(order_filter, MenuItem.inventory_id.isnot(None))
+    db.session.execute(
+        insert(InventoryMovement.__table__).from_select(
+            ["inventory_id", "delta", "reason", "order_id"],
+            select(
+                MenuItem.inventory_id,
+                sign * func.sum(OrderItem.quantity),
+                literal(reason),
+                OrderItem.order_id,
+            )
+            .join(MenuItem, MenuItem.id == OrderItem.menu_item_id)
+            .where(line_filter)
+            .group_by(MenuItem.inventory_id, OrderItem.order_id),
+        )
+    )
+
+    lines = (
+        select(MenuItem.inventory_id)
+        .join(OrderItem, OrderItem.menu_item_id == MenuItem.id)
+        .where(line_filter)
+    )
+    quantity = (
+        select(func.sum(OrderItem.quantity))
+        .join(MenuItem, MenuItem.id == OrderItem.menu_item_id)
+        .where(line_filter, MenuItem.inventory_id == Inventory.id)
+        .scalar_subquery()
+    )
+    return db.session.execute(
+        update(Inventory)
+        .where(Inventory.id.in_(lines))
+        .values(quantity=Inventory.quantity + sign * quantity)
+        .returning(Inventory.id, Inventory.quantity)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+
+def reserve_order_stock(order_id):
+    """
+    Takes stock for every line of a new order. Raises OutOfStock if any item
+    would go negative; the caller must then roll back. The caller commits.
+    """
+    changes = _adjust_order_stock(OrderItem.order_id == order_id, -1, "order")
+    short = sorted(row.id for row in changes if row.quantity < 0)
+    if short:
+        raise OutOfStock(short)
+    return changes
+
+
+def release_order_stock(order_ids):
+    return _adjust_order_stock(OrderItem.order_id.in_(order_ids), 1, "order_cancelled")
+
+
+def _stock_levels(inventory_ids):
+    return db.session.execute(
+        select(Inventory.id, Inventory.quantity).where(Inventory.id.in_(inventory_ids))
+    ).all()
+
+
+def apply_stock_deltas(deltas, reason):
+    """
+    Adds each (inventory_id, delta) to the snapshot and records it in the
+    ledger, as two executemany statements. The increments are applied in the
+    database, so concurrent adjustments never overwrite each other. Returns
+    the resulting (id, quantity) rows; the caller commits.
+    """
+    params = [{"b_id": inventory_id, "b_delta": delta} for inventory_id, delta in deltas]
+    db.session.execute(
+        insert(InventoryMovement.__table__).values(
+            inventory_id=bindparam("b_id"),
+            delta=bindparam("b_delta"),
+            reason=reason,
+        ),
+        params,
+    )
+    db.session.execute(
+        update(Inventory.__table__)
+        .where(Inventory.id == bindparam("b_id"))
+        .values(quantity=Inventory.quantity + bindparam("b_delta")),
+        params,
+    )
+    return _stock_levels([inventory_id for inventory_id, _ in deltas])
+
+
+def set_stock_levels(levels, reason):
+    """
+    Sets each (inventory_id, quantity) as counted, recording the difference
+    from the current snapshot in the ledger. Rows already at the counted
+    quantity get no movement. Returns the resulting (id, quantity) rows; the
+    caller commits.
+    """
+    params = [
+        {"b_id": inventory_id, "b_quantity": quantity} for inventory_id, quantity in levels
+    ]
+    # The movement is written before the snapshot so the delta is taken from
+    # the quantity being replaced, inside the same transaction.
+    db.session.execute(
+        insert(InventoryMovement.__table__).from_select(
+            ["inventory_id", "delta", "reason"],
+            select(
+                Inventory.id,
+                bindparam("b_quantity", type_=Integer) - Inventory.quantity,
+                literal(reason),
+            ).where(
+                Inventory.id == bindparam("b_id"),
+                Inventory.quantity != bindparam("b_quantity", type_=Integer),
+            ),
+        ),
+        params,
+    )
+    db.session.execute(
+        update(Inventory.__table__)
+        .where(Inventory.id == bindparam("b_id"))
+        .values(quantity=bindparam("b_quantity")),
+        params,
+    )
+    return _stock_levels([inventory_id for inventory_id, _ in levels])
+
+
+def _later_deltas(through):
+    return (
+        select(func.coalesce(func.sum(InventoryMovement.delta), 0))
+        .where(InventoryMovement.inventory_id == Inventory.id, InventoryMovement.id > through)
+        .scalar_subquery()
+    )
+
+
+def open_balances():
+    """
+    Sets compacted_quantity on rows that were never compacted to whatever
+    part of their stock the ledger doesn't explain, i.e. the opening
+    balance of rows that predate it. The caller commits.
+    """
+    db.session.execute(
+        update(Inventory)
+        .where(Inventory.compacted_through == 0)
+        .values(compacted_quantity=Inventory.quantity - _later_deltas(0))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def ledger_drift():
+    """
+    Lists (inventory_id, quantity, ledger_quantity) for every row whose
+    snapshot disagrees with compacted_quantity plus its later movements.
+    """
+    ledger_quantity = Inventory.compacted_quantity + _later_deltas(
+        Inventory.compacted_through
+    )
+    return db.session.execute(
+        select(Inventory.id, Inventory.quantity, ledger_quantity)
+        .where(Inventory.quantity != ledger_quantity)
+        .order_by(Inventory.id)
+    ).all()
+
+
+def compact_batch(cutoff, batch_size):
+    movement_ids = db.session.execute(
+        select(InventoryMovement.id)
+        .where(InventoryMovement.created_at < cutoff)
+        .order_by(InventoryMovement.id)
+        .limit(batch_size)
+    ).scalars().all()
+    if not movement_ids:
+        return 0
+
+    # Earlier batches already removed everything below the batch, so folding
+    # every movement up to its last id keeps compacted_through contiguous.
+    through = movement_ids[-1]
+    folded = InventoryMovement.id <= through
+    delta = (
+        select(func.sum(InventoryMovement.delta))
+        .where(folded, InventoryMovement.inventory_id == Inventory.id)
+        .scalar_subquery()
+    )
+    db.session.execute(
+        update(Inventory)
+        .where(Inventory.id.in_(select(InventoryMovement.inventory_id).where(folded)))
+        .values(
+            compacted_quantity=Inventory.compacted_quantity + delta,
+            compacted_through=through,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(delete(InventoryMovement).where(folded))
+    db.session.commit()
+    return len(movement_ids)
+
+
+def compact_movements(days=None, batch_size=None):
+    """
+    Folds ledger movements older than `days` into each inventory row's
+    compacted_quantity and deletes them, after recording the opening
+    balance of rows that predate the ledger. Each batch is its own
+    transaction, like order archiving, so the ledger is never locked for
+    long.
+    """
+    days = current_app.config["INVENTORY_COMPACT_AFTER_DAYS"] if days is None else days
+    batch_size = batch_size or current_app.config["INVENTORY_COMPACT_BATCH_SIZE"]
+    cutoff = datetime.utcnow() - timedelta(days=days)
+
+    open_balances()
+    db.session.commit()
+    total = 0
+    while True:
+        folded = compact_batch(cutoff, batch_size)
+        total += folded
+        if folded < batch_size:
+            return total
+
+
+def stock_level(quantity):
+    if quantity <= 0:
+        return "sold_out"
+    if quantity <= current_app.config["LOW_STOCK_THRESHOLD"]:
+        return "low"
+    return "in_stock"
+
+
+def inventory_branches(inventory_ids):
+    rows = db.session.query(MenuItem.inventory_id, MenuItem.branch_id).filter(
+        MenuItem.inventory_id.in_(inventory_ids)
+    )
+    return {inventory_id: branch_id for inventory_id, branch_id in rows}
+
+
+class StockBroadcaster:
+    """
+    Debounces stock changes: keeps only the latest quantity per inventory
+    row and emits one stock_update_batch frame per branch room once the
+    window closes. Moves between in stock, low and sold out are pushed
+    immediately as stock_alert.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._levels = {}
+        self._flush_scheduled = False
+
+    def publish(self, changes):
+        alerts = []
+        with self._lock:
+            for inventory_id, quantity in changes:
+                self._pending[inventory_id] = quantity
+                level = stock_level(quantity)
+                previous = self._levels.get(inventory_id)
+                self._levels[inventory_id] = level
+                # The first sighting of a well-stocked item isn't news.
+                if level != previous and (previous or level != "in_stock"):
+                    alerts.append((inventory_id, quantity, level))
+            schedule = bool(self._pending) and not self._flush_scheduled
+            if schedule:
+                self._flush_scheduled = True
+
+        if alerts:
+            branches = inventory_branches([alert[0] for alert in alerts])
+            for inventory_id, quantity, level in alerts:
+                socketio.emit(
+                    "stock_alert",
+                    {"inventory_id": inventory_id, "quantity": quantity, "level": level},
+                    namespace="/inventory",
+                    to=branch_room(branches.get(inventory_id)),
+                )
+
+        if schedule:
+            # Same plain timer thread as the order feed; see OrderStatusFeed.
+            app = current_app._get_current_object()
+            timer = threading.Timer(
+                app.config["STOCK_FEED_WINDOW"], self._flush_in_context, (app,)
+            )
+            timer.daemon = True
+            timer.start()
+
+    def _flush_in_context(self, app):
+        with app.app_context():
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flush_scheduled = False
+        if not pending:
+            return
+
+        branches = inventory_branches(list(pending))
+        frames = {}
+        for inventory_id, quantity in pending.items():
+            frames.setdefault(branches.get(inventory_id), []).append(
+                {"inventory_id": inventory_id, "new_quantity": quantity}
+            )
+        for branch_id, items in frames.items():
+            socketio.emit(
+                "stock_update_batch",
+                {"branch_id": branch_id, "items": items},
+                namespace="/inventory",
+                to=branch_room(branch_id),
+            )
+
+
+stock_broadcaster = StockBroadcaster()
+
+
+def publish_stock_changes(changes):
+    if changes:
+        stock_broadcaster.publish(changes)
+
+
+@socketio.on("subscribe", namespace="/inventory")
+def handle_subscribe(data):
+    join_room(branch_room(data.get("branch_id")), sid=request.sid, namespace="/inventory")
+
+
+@socketio.on("unsubscribe", namespace="/inventory")
+def handle_unsubscribe(data):
+    leave_room(
+        branch_room(data.get("branch_id")), sid=request.sid, namespace="/inventory"
+    )
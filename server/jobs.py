@@ -0,0 +1,127 @@
+# server/jobs.py
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_, select, update
+
+from .models import db, Job
+
+
+job_handlers = {}
+
+
+def job_handler(kind):
+    def register(func):
+        job_handlers[kind] = func
+        return func
+
+    return register
+
+
+def enqueue_job(kind, payload, delay=0, max_attempts=None):
+    """
+    Adds a job to the current session; it becomes visible to workers when
+    the caller commits, so it is written atomically with the caller's rows.
+    """
+    job = Job(
+        kind=kind,
+        payload=payload,
+        status="queued",
+        run_after=datetime.utcnow() + timedelta(seconds=delay),
+        max_attempts=max_attempts or current_app.config["JOB_MAX_ATTEMPTS"],
+    )
+    db.session.add(job)
+    return job
+
+
+def claim_job():
+    now = datetime.utcnow()
+    claimable = or_(
+        and_(Job.status == "queued", Job.run_after <= now),
+        and_(Job.status == "running", Job.locked_until < now),
+    )
+    next_job = select(Job.id).where(claimable).order_by(Job.id).limit(1).scalar_subquery()
+    # Re-checking the claim condition makes the UPDATE a compare-and-set, so
+    # two workers racing for the same row can't both win it.
+    job = db.session.execute(
+        update(Job)
+        .where(Job.id == next_job, claimable)
+        .values(
+            status="running",
+            attempts=Job.attempts + 1,
+            locked_until=now + timedelta(seconds=current_app.config["JOB_LEASE_SECONDS"]),
+        )
+        .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+    ).first()
+    db.session.commit()
+    return job
+
+
+def run_job(job):
+    handler = job_handlers.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind {job.kind}")
+        handler(job.payload)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Job {job.id} ({job.kind}) failed on attempt {job.attempts}: {e}")
+        if job.attempts >= job.max_attempts:
+            values = {"status": "failed"}
+        else:
+            backoff = timedelta(seconds=2 ** job.attempts)
+            values = {"status": "queued", "run_after": datetime.utcnow() + backoff}
+        db.session.execute(
+            update(Job)
+            .where(Job.id == job.id)
+            .values(last_error=str(e)[:500], locked_until=None, **values)
+        )
+    else:
+        db.session.execute(
+            update(Job).where(Job.id == job.id).values(status="done", locked_until=None)
+        )
+    db.session.commit()
+
+
+def work(app, stop_event):
+    poll_interval = app.config["JOB_POLL_INTERVAL"]
+    while not stop_event.is_set():
+        with app.app_context():
+            try:
+                job = claim_job()
+                if job is not None:
+                    run_job(job)
+            except Exception as e:
+                db.session.rollback()
+                logging.error(f"Job worker error: {e}")
+                job = None
+        if job is None:
+            stop_event.wait(poll_interval)
+
+
+class JobWorkerPool:
+    def __init__(self, app, size=None):
+        self.app = app
+        self.size = app.config["JOB_WORKERS"] if size is None else size
+        self.stop_event = threading.Event()
+        self.threads = []
+
+    def start(self):
+        for number in range(self.size):
+            thread = threading.Thread(
+                target=work,
+                args=(self.app, self.stop_event),
+                name=f"job-worker-{number}",
+                daemon=True,
+            )
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout)
@@ -0,0 +1,73 @@
+# server/menu_cache.py
+import hashlib
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+
+from .menu_sync import current_menu_version
+from .models import db, MenuItem
+
+
+MenuSnapshot = namedtuple("MenuSnapshot", ["body", "etag", "version", "built_at"])
+
+MENU_FIELDS = ("id", "name", "description", "category", "rating", "price", "image_url")
+
+
+def menu_columns():
+    return [getattr(MenuItem, field) for field in MENU_FIELDS]
+
+
+def serialize_menu_rows(rows):
+    return [dict(zip(MENU_FIELDS, row)) for row in rows]
+
+
+class MenuSnapshotCache:
+    """
+    Holds the encoded GET /api/menu payload and its content hash so the
+    steady-state path never touches the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._generation = 0
+
+    def get(self):
+        snapshot = self._snapshot
+        if snapshot is not None and not self._expired(snapshot):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and not self._expired(snapshot):
+                return snapshot
+
+            generation = self._generation
+            snapshot = self._build()
+            # A write that lands while we were reading may already be missing
+            # from this snapshot, so only publish it if nothing changed.
+            if generation == self._generation:
+                self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self):
+        self._generation += 1
+        self._snapshot = None
+
+    def _expired(self, snapshot):
+        ttl = current_app.config.get("MENU_CACHE_TTL")
+        return bool(ttl) and time.monotonic() - snapshot.built_at > ttl
+
+    def _build(self):
+        version = current_menu_version()
+        rows = db.session.query(*menu_columns()).order_by(MenuItem.id)
+        body = current_app.json.dumps(serialize_menu_rows(rows)).encode("utf-8")
+        etag = hashlib.sha256(body).hexdigest()
+        return MenuSnapshot(
+            body=body, etag=etag, version=version, built_at=time.monotonic()
+        )
+
+
+menu_cache = MenuSnapshotCache()
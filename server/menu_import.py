@@ -0,0 +1,185 @@
+# server/menu_import.py
+import codecs
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import insert, update
+
+from .menu_sync import next_menu_version
+from .models import db, MenuItem
+
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+IMPORT_FIELDS = (
+    "id",
+    "name",
+    "description",
+    "category",
+    "rating",
+    "price",
+    "image_url",
+    "branch_id",
+)
+
+
+def iter_json_lines(stream):
+    for line_number, line in enumerate(codecs.iterdecode(stream, "utf-8"), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e}")
+
+
+def iter_csv_rows(stream):
+    reader = csv.DictReader(codecs.iterdecode(stream, "utf-8"))
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            # DictReader only updates line_num on success, so take it from the
+            # underlying reader. Reading resumes at the next record.
+            yield reader.reader.line_num, ValueError(f"Invalid CSV: {e}")
+            continue
+        yield reader.line_num, row
+
+
+def _optional_int(raw, field):
+    if raw in (None, ""):
+        return None
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be an integer")
+
+
+def _required_text(raw, field):
+    value = raw.get(field)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"{field.capitalize()} must be a string")
+    value = (value or "").strip()
+    if not value:
+        raise ValueError(f"{field.capitalize()} is required")
+    return value
+
+
+def _optional_text(raw, field):
+    value = raw.get(field)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"{field} must be a string")
+    return value or None
+
+
+def validate_menu_row(raw):
+    if not isinstance(raw, dict):
+        raise ValueError("Row must be an object")
+
+    name = _required_text(raw, "name")
+    category = _required_text(raw, "category")
+
+    try:
+        price = Decimal(str(raw.get("price")))
+    except InvalidOperation:
+        raise ValueError("Price is required and must be a number")
+    if not price.is_finite() or price < 0:
+        raise ValueError("Price must be a non-negative number")
+
+    rating = _optional_int(raw.get("rating"), "rating")
+    if rating is not None and not 1 <= rating <= 5:
+        raise ValueError("Rating must be between 1 and 5")
+
+    return {
+        "id": _optional_int(raw.get("id"), "id"),
+        "name": name,
+        "description": _optional_text(raw, "description"),
+        "category": category,
+        "rating": rating,
+        "price": price,
+        "image_url": _optional_text(raw, "image_url"),
+        "branch_id": _optional_int(raw.get("branch_id"), "branch_id"),
+    }
+
+
+def _write_chunk(rows, version):
+    ids = [row["id"] for row in rows if row["id"] is not None]
+    existing = set()
+    if ids:
+        existing = {
+            menu_item_id
+            for (menu_item_id,) in db.session.query(MenuItem.id).filter(
+                MenuItem.id.in_(ids)
+            )
+        }
+
+    inserts, updates = [], []
+    for row in rows:
+        row["version"] = version
+        if row["id"] in existing:
+            updates.append(row)
+        else:
+            if row["id"] is None:
+                del row["id"]
+            inserts.append(row)
+
+    # Rows are grouped by key set so each group is one executemany.
+    with_id = [row for row in inserts if "id" in row]
+    without_id = [row for row in inserts if "id" not in row]
+    for group in (with_id, without_id):
+        if group:
+            db.session.execute(insert(MenuItem.__table__), group)
+    if updates:
+        db.session.execute(update(MenuItem), updates)
+    return len(inserts), len(updates)
+
+
+def import_menu_items(rows):
+    """
+    Validates (line_number, raw_row) pairs as they stream in and upserts the
+    valid ones in chunks of executemany statements, all in one transaction.
+    """
+    report = {"inserted": 0, "updated": 0, "error_count": 0, "errors": []}
+    version = next_menu_version(db.session.connection())
+    chunk = []
+    seen_ids = set()
+
+    def flush_chunk():
+        inserted, updated = _write_chunk(chunk, version)
+        report["inserted"] += inserted
+        report["updated"] += updated
+        chunk.clear()
+
+    try:
+        for line_number, raw in rows:
+            try:
+                if isinstance(raw, Exception):
+                    raise raw
+                row = validate_menu_row(raw)
+                if row["id"] is not None:
+                    # A second row with the same id would collide with the
+                    # first one's insert, so only the first is applied.
+                    if row["id"] in seen_ids:
+                        raise ValueError(f"Duplicate id {row['id']} earlier in the import")
+                    seen_ids.add(row["id"])
+                chunk.append(row)
+            except ValueError as e:
+                report["error_count"] += 1
+                if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                    report["errors"].append({"line": line_number, "error": str(e)})
+                continue
+
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                flush_chunk()
+        if chunk:
+            flush_chunk()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return report
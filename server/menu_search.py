@@ -0,0 +1,118 @@
+# server/menu_search.py
+import re
+import threading
+
+from sqlalchemy import event, or_, text
+
+from .menu_cache import MENU_FIELDS, menu_columns
+from .models import db, MenuItem
+
+
+FTS_TABLE = "menu_item_fts"
+
+FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description, category,
+        content='menu_item', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS menu_item_fts_ai AFTER INSERT ON menu_item BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS menu_item_fts_ad AFTER DELETE ON menu_item BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS menu_item_fts_au
+    AFTER UPDATE OF name, description, category ON menu_item BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+        INSERT INTO {FTS_TABLE}(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END
+    """,
+]
+
+_index_ready = False
+_index_lock = threading.Lock()
+
+
+def create_search_index(connection):
+    """
+    Creates the FTS5 table and its sync triggers, backfilling the index when
+    the table did not exist yet (e.g. databases created before search).
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE},
+    ).first()
+    for statement in FTS_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+@event.listens_for(MenuItem.__table__, "after_create")
+def _create_search_index_with_table(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        create_search_index(connection)
+
+
+def ensure_search_index():
+    global _index_ready
+    if _index_ready:
+        return
+    with _index_lock:
+        if not _index_ready:
+            with db.engine.begin() as connection:
+                create_search_index(connection)
+            _index_ready = True
+
+
+def build_match_query(q):
+    # Quote every term so user input can't inject FTS syntax, and make each
+    # one a prefix match so "lob" finds "lobster".
+    terms = re.findall(r"\w+", q)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_menu(q, limit):
+    if db.engine.dialect.name != "sqlite":
+        pattern = f"%{q}%"
+        return (
+            db.session.query(*menu_columns())
+            .filter(
+                or_(
+                    MenuItem.name.ilike(pattern),
+                    MenuItem.description.ilike(pattern),
+                    MenuItem.category.ilike(pattern),
+                )
+            )
+            .order_by(MenuItem.id)
+            .limit(limit)
+            .all()
+        )
+
+    match = build_match_query(q)
+    if not match:
+        return []
+
+    ensure_search_index()
+    columns = ", ".join(f"menu_item.{field}" for field in MENU_FIELDS)
+    rows = db.session.execute(
+        text(
+            f"SELECT {columns} FROM {FTS_TABLE} "
+            f"JOIN menu_item ON menu_item.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH :match ORDER BY rank LIMIT :limit"
+        ).columns(*(MenuItem.__table__.c[field] for field in MENU_FIELDS)),
+        {"match": match, "limit": limit},
+    )
+    return rows.all()
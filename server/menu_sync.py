@@ -0,0 +1,60 @@
+# server/menu_sync.py
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from .models import db, MenuItem, MenuItemTombstone, MenuVersion
+
+
+MENU_VERSION_ID = 1
+
+
+def next_menu_version(connection):
+    """
+    Bumps the global menu version counter and returns the new value. The
+    UPDATE takes the write lock, so concurrent writers never share a version.
+    """
+    version = connection.execute(
+        text("UPDATE menu_version SET value = value + 1 WHERE id = :id RETURNING value"),
+        {"id": MENU_VERSION_ID},
+    ).scalar()
+    if version is None:
+        connection.execute(
+            text("INSERT INTO menu_version (id, value) VALUES (:id, 1)"),
+            {"id": MENU_VERSION_ID},
+        )
+        version = 1
+    return version
+
+
+def current_menu_version(connection=None):
+    connection = connection or db.session
+    version = connection.execute(
+        text("SELECT value FROM menu_version WHERE id = :id"), {"id": MENU_VERSION_ID}
+    ).scalar()
+    return version or 0
+
+
+@event.listens_for(MenuVersion.__table__, "after_create")
+def _seed_menu_version(target, connection, **kw):
+    connection.execute(
+        text("INSERT INTO menu_version (id, value) VALUES (:id, 0)"),
+        {"id": MENU_VERSION_ID},
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_menu_changes(session, flush_context, instances):
+    changed = [
+        obj
+        for obj in list(session.new) + list(session.dirty)
+        if isinstance(obj, MenuItem) and session.is_modified(obj)
+    ]
+    deleted = [obj for obj in session.deleted if isinstance(obj, MenuItem)]
+    if not changed and not deleted:
+        return
+
+    version = next_menu_version(session.connection())
+    for menu_item in changed:
+        menu_item.version = version
+    for menu_item in deleted:
+        session.add(MenuItemTombstone(menu_item_id=menu_item.id, version=version))
@@ -28,14 +28,39 @@ class MenuItem(db.Model):
     )
     branch_id = db.Column(db.Integer, db.ForeignKey("branch.id"))
     branch = db.relationship("Branch", backref=db.backref("menu_items", lazy=True))
+    version = db.Column(db.Integer, nullable=False, default=0, index=True)
+    updated_at = db.Column(
+        db.DateTime,
+        default=db.func.current_timestamp(),
+        onupdate=db.func.current_timestamp(),
+    )
+
+    __table_args__ = (
+        db.Index("ix_menu_item_branch_category_id", "branch_id", "category", "id"),
+        db.Index("ix_menu_item_price", "price"),
+    )
 
     def __repr__(self):
         return f"<MenuItem {self.id} - {self.name}>"
 
 
+class MenuItemTombstone(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    menu_item_id = db.Column(db.Integer, nullable=False)
+    version = db.Column(db.Integer, nullable=False, index=True)
+    deleted_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+
+class MenuVersion(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+
 class Cart(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("user.id"), nullable=False, unique=True
+    )
     items = relationship("CartItem", backref="cart")
 
 
@@ -46,6 +71,10 @@ class CartItem(db.Model):
     quantity = db.Column(db.Integer, nullable=False)
     menu_item = db.relationship("MenuItem")
 
+    __table_args__ = (
+        db.UniqueConstraint("cart_id", "menu_item_id", name="uq_cart_item_cart_menu_item"),
+    )
+
 
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -53,9 +82,28 @@ class Order(db.Model):
     order_date = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
     status = db.Column(db.String(50), nullable=False)
     phone_number = db.Column( db.String(15), unique=True)
+    total_amount = db.Column(db.Numeric(10, 2))
+    branch_id = db.Column(db.Integer, db.ForeignKey("branch.id"))
+    # Set once, just before the STK push is sent; see claim_order_payment.
+    payment_requested_at = db.Column(db.DateTime)
     user = db.relationship("User", backref=db.backref("orders", lazy=True))
     order_items = db.relationship("OrderItem", backref="order", lazy=True)  
 
+    __table_args__ = (
+        db.Index(
+            "ix_order_user_date_id",
+            "user_id_order",
+            "order_date",
+            "id",
+            "status",
+            "total_amount",
+        ),
+        db.Index("ix_order_branch_status", "branch_id", "status"),
+        # Archived ids must never be handed out again, which SQLite does for
+        # plain INTEGER primary keys once the highest row is deleted.
+        {"sqlite_autoincrement": True},
+    )
+
     def __repr__(self):
         return f"<Order {self.id}>"
 
@@ -65,10 +113,14 @@ class OrderItem(db.Model):
     order_id = db.Column(db.Integer, db.ForeignKey("order.id"), nullable=False)
     menu_item_id = db.Column(db.Integer, db.ForeignKey("menu_item.id"), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
+    unit_price = db.Column(db.Numeric(10, 2))
+    line_total = db.Column(db.Numeric(10, 2))
     menu_item = db.relationship(
         "MenuItem", backref=db.backref("order_items", lazy=True)
     )
 
+    __table_args__ = {"sqlite_autoincrement": True}
+
 
 class Reservation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -80,15 +132,82 @@ class Reservation(db.Model):
     status = db.Column(db.String(20), default='Pending')
     phone_number = db.Column(db.String(20), nullable=False)
     reservation_time = db.Column(db.Time, nullable=False)
-    
+    branch_id = db.Column(db.Integer, db.ForeignKey("branch.id"))
+    party_size = db.Column(db.Integer, nullable=False, default=2)
+    duration_minutes = db.Column(db.Integer, nullable=False, default=90)
+    # reservation_date + duration_minutes, stored so overlap checks are plain
+    # column comparisons on every database.
+    ends_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_reservation_table_date", "table_number", "reservation_date"),
+        db.Index("ix_reservation_date", "reservation_date"),
+    )
+
     def __repr__(self):
         return f"<Reservation {self.id}>"
 
 
+class DiningTable(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    branch_id = db.Column(db.Integer, db.ForeignKey("branch.id"))
+    table_number = db.Column(db.Integer, nullable=False)
+    seats = db.Column(db.Integer, nullable=False)
+    table_type = db.Column(db.String(20), nullable=False, default="standard")
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "branch_id", "table_number", name="uq_dining_table_branch_number"
+        ),
+    )
+
+    def __repr__(self):
+        return f"<DiningTable {self.table_number} ({self.seats} seats)>"
+
+
+class ReservationRate(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    # A null branch_id, weekday or table_type matches every value; the most
+    # specific matching rate wins. Holiday rates replace weekday rates on
+    # their date.
+    branch_id = db.Column(db.Integer, db.ForeignKey("branch.id"))
+    weekday = db.Column(db.Integer)
+    holiday = db.Column(db.Date)
+    start_hour = db.Column(db.Integer, nullable=False, default=0)
+    end_hour = db.Column(db.Integer, nullable=False, default=24)
+    table_type = db.Column(db.String(20))
+    price = db.Column(db.Numeric(10, 2), nullable=False)
+
+    def __repr__(self):
+        return f"<ReservationRate {self.id} - {self.price}>"
+
+
 class Inventory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     item_name = db.Column(db.String(100), nullable=False)
+    # Current stock, kept in step with the movement ledger. Once compaction
+    # has recorded the opening balance it equals compacted_quantity plus the
+    # deltas of movements after compacted_through.
     quantity = db.Column(db.Integer, nullable=False)
+    compacted_quantity = db.Column(db.Integer, nullable=False, default=0)
+    compacted_through = db.Column(db.Integer, nullable=False, default=0)
+
+
+class InventoryMovement(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    inventory_id = db.Column(db.Integer, db.ForeignKey('inventory.id'), nullable=False)
+    delta = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(20), nullable=False)
+    order_id = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
+
+    __table_args__ = (
+        db.Index("ix_inventory_movement_inventory_id", "inventory_id", "id"),
+        db.Index("ix_inventory_movement_created_at", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<InventoryMovement {self.inventory_id} {self.delta:+d} ({self.reason})>"
 
 
 class MpesaTransaction(db.Model):
@@ -110,6 +229,8 @@ class MpesaTransaction(db.Model):
         "Reservation", backref=db.backref("mpesa_transactions", lazy=True)
     )
 
+    __table_args__ = {"sqlite_autoincrement": True}
+
     def __repr__(self):
         return f"<MpesaTransaction {self.id}>"
 
@@ -138,3 +259,88 @@ class Branch(db.Model):
     contact_number = db.Column(db.String(15), nullable=False)
     latitude = db.Column(db.Float)  
     longitude = db.Column(db.Float)  
+
+
+class Job(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_after = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
+    locked_until = db.Column(db.DateTime)
+    last_error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    updated_at = db.Column(
+        db.DateTime,
+        default=db.func.current_timestamp(),
+        onupdate=db.func.current_timestamp(),
+    )
+
+    __table_args__ = (db.Index("ix_job_status_run_after", "status", "run_after"),)
+
+    def __repr__(self):
+        return f"<Job {self.id} - {self.kind}>"
+
+
+class IdempotencyKey(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(255), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)
+    response = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    locked_until = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.UniqueConstraint("scope", "key", name="uq_idempotency_key_scope_key"),
+    )
+
+
+class ArchivedOrder(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id_order = db.Column(db.Integer, nullable=False)
+    order_date = db.Column(db.DateTime, nullable=False)
+    status = db.Column(db.String(50), nullable=False)
+    phone_number = db.Column(db.String(15))
+    total_amount = db.Column(db.Numeric(10, 2))
+    branch_id = db.Column(db.Integer)
+    payment_requested_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    order_items = db.relationship("ArchivedOrderItem", backref="order", lazy=True)
+
+    __table_args__ = (
+        db.Index("ix_archived_order_user_date_id", "user_id_order", "order_date", "id"),
+    )
+
+    def __repr__(self):
+        return f"<ArchivedOrder {self.id}>"
+
+
+class ArchivedOrderItem(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(
+        db.Integer, db.ForeignKey("archived_order.id"), nullable=False, index=True
+    )
+    menu_item_id = db.Column(db.Integer, db.ForeignKey("menu_item.id"), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    unit_price = db.Column(db.Numeric(10, 2))
+    line_total = db.Column(db.Numeric(10, 2))
+    menu_item = db.relationship("MenuItem")
+
+
+class ArchivedMpesaTransaction(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    merchant_request_id = db.Column(db.String(100), nullable=False)
+    checkout_request_id = db.Column(db.String(100), nullable=False)
+    result_code = db.Column(db.Integer, nullable=False)
+    result_description = db.Column(db.String(255), nullable=False)
+    amount = db.Column(db.Numeric(10, 2))
+    mpesa_receipt_number = db.Column(db.String(50))
+    transaction_date = db.Column(db.DateTime)
+    phone_number = db.Column(db.String(15), nullable=False)
+    order_id = db.Column(db.Integer, index=True)
+    reservation_id = db.Column(db.Integer)
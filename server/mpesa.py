@@ -2,10 +2,12 @@
 
 from flask import request,jsonify
 from .models import db, MpesaTransaction
-import requests
+from .daraja_client import get_daraja_client
 from requests.auth import HTTPBasicAuth
 import base64
 import json
+import threading
+import time
 from datetime import datetime
 from flask import current_app
 import logging
@@ -14,26 +16,101 @@ from decimal import Decimal
 logging.basicConfig(level=logging.DEBUG)
 
 
-def get_mpesa_access_token():
-    consumer_key = current_app.config["MPESA_CONSUMER_KEY"]
-    consumer_secret = current_app.config["MPESA_CONSUMER_SECRET"]
-    api_url = "https://sandbox.safaricom.co.ke/oauth/v1/generate?grant_type=client_credentials"
+class AccessTokenCache:
+    """
+    Process-wide cache of the Daraja OAuth token. The token is refreshed
+    MPESA_TOKEN_REFRESH_MARGIN seconds before its expires_in runs out, and
+    only one thread refreshes at a time: the others wait on the lock and
+    reuse the token it fetched.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._entry = None
+        self.hits = 0
+        self.misses = 0
+        self.refresh_failures = 0
+
+    def _fresh(self, consumer_key):
+        entry = self._entry
+        if entry and entry[0] == consumer_key and time.monotonic() < entry[2]:
+            return entry[1]
+        return None
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, consumer_key, fetch):
+        token = self._fresh(consumer_key)
+        if token is None:
+            with self._lock:
+                token = self._fresh(consumer_key)
+                if token is None:
+                    self._count("misses")
+                    try:
+                        token, expires_in = fetch()
+                    except Exception:
+                        self._count("refresh_failures")
+                        raise
+                    margin = current_app.config["MPESA_TOKEN_REFRESH_MARGIN"]
+                    expires_at = time.monotonic() + max(int(expires_in) - margin, 0)
+                    self._entry = (consumer_key, token, expires_at)
+                    return token
+        self._count("hits")
+        return token
+
+    def invalidate(self):
+        self._entry = None
+
+    def stats(self):
+        entry = self._entry
+        with self._stats_lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "refresh_failures": self.refresh_failures,
+                "cached": entry is not None,
+                "refresh_in": max(int(entry[2] - time.monotonic()), 0) if entry else None,
+            }
+
+
+token_cache = AccessTokenCache()
+
+
+def fetch_mpesa_access_token(consumer_key, consumer_secret):
     auth_header = {
         "Authorization": f"Basic {base64.b64encode(f'{consumer_key}:{consumer_secret}'.encode()).decode()}"
     }
 
     try:
-        r = requests.get(api_url, headers=auth_header)
+        r = get_daraja_client().get(
+            "/oauth/v1/generate",
+            params={"grant_type": "client_credentials"},
+            headers=auth_header,
+        )
         mpesa_access_token = r.json()
-        return mpesa_access_token["access_token"]
+        return mpesa_access_token["access_token"], mpesa_access_token["expires_in"]
     except Exception as e:
         logging.error(f"Error fetching M-Pesa access token: {e}")
         raise
 
 
+def get_mpesa_access_token():
+    consumer_key = current_app.config["MPESA_CONSUMER_KEY"]
+    consumer_secret = current_app.config["MPESA_CONSUMER_SECRET"]
+    return token_cache.get(
+        consumer_key, lambda: fetch_mpesa_access_token(consumer_key, consumer_secret)
+    )
+
+
+def mpesa_token_stats():
+    return jsonify(token_cache.stats())
+
+
 def lipa_na_mpesa_online(phone_number, amount, order_id):
     access_token = get_mpesa_access_token()
-    api_url = "https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
     headers = {"Authorization": "Bearer %s" % access_token}
 
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
@@ -66,7 +143,12 @@ def lipa_na_mpesa_online(phone_number, amount, order_id):
     }
     logging.info(f"Payload sent to M-Pesa API: {payload}") 
 
-    response = requests.post(api_url, json=payload, headers=headers)
+    response = get_daraja_client().post(
+        "/mpesa/stkpush/v1/processrequest", json=payload, headers=headers
+    )
+    if response.status_code == 401:
+        # Revoked early; the next call fetches a new one.
+        token_cache.invalidate()
     logging.info(f"M-Pesa API response: {response.json()}")  
 
     return response.json()
@@ -113,7 +195,6 @@ def simulate_mpesa_api_call(phone_number, amount, order_id):
 
 def reverse_mpesa_transaction(original_transaction_id, amount):
     access_token = get_mpesa_access_token()
-    api_url = "https://sandbox.safaricom.co.ke/mpesa/reversal/v1/request"
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
@@ -138,7 +219,11 @@ def reverse_mpesa_transaction(original_transaction_id, amount):
     logging.info(f"Payload sent for M-Pesa reversal: {payload}")
 
     try:
-        response = requests.post(api_url, json=payload, headers=headers)
+        response = get_daraja_client().post(
+            "/mpesa/reversal/v1/request", json=payload, headers=headers
+        )
+        if response.status_code == 401:
+            token_cache.invalidate()
         logging.info(f"M-Pesa reversal API response: {response.json()}")
         return response.json()
     except Exception as e:
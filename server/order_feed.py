@@ -0,0 +1,108 @@
+# server/order_feed.py
+import threading
+
+from flask import current_app, request
+from flask_socketio import emit, join_room, leave_room
+
+from .app import socketio
+from .models import db, Order
+
+
+ACTIVE_ORDER_STATUSES = ("Pending", "Paid", "Preparing", "Ready")
+
+
+def branch_room(branch_id):
+    return f"branch:{branch_id if branch_id is not None else 'none'}"
+
+
+class OrderStatusFeed:
+    """
+    Buffers order status changes for a short window, keeps one entry per
+    order (its first old status and latest new status) and emits one
+    batched frame per branch room when the window closes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._flush_scheduled = False
+
+    def publish(self, order_id, branch_id, old_status, new_status):
+        with self._lock:
+            entry = self._pending.get(order_id)
+            if entry:
+                entry["new_status"] = new_status
+            else:
+                self._pending[order_id] = {
+                    "order_id": order_id,
+                    "branch_id": branch_id,
+                    "old_status": old_status,
+                    "new_status": new_status,
+                }
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+
+        # A plain timer thread rather than socketio.start_background_task:
+        # publishes come from request and job worker threads that an
+        # unpatched server never yields to, so a green task would not run.
+        timer = threading.Timer(current_app.config["ORDER_FEED_WINDOW"], self.flush)
+        timer.daemon = True
+        timer.start()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flush_scheduled = False
+
+        frames = {}
+        for update in pending.values():
+            # An order that went there and back within the window is a no-op.
+            if update["old_status"] == update["new_status"]:
+                continue
+            frames.setdefault(update.pop("branch_id"), []).append(update)
+
+        for branch_id, updates in frames.items():
+            socketio.emit(
+                "order_status_batch",
+                {"branch_id": branch_id, "updates": updates},
+                namespace="/order",
+                to=branch_room(branch_id),
+            )
+
+
+order_feed = OrderStatusFeed()
+
+
+def active_orders_snapshot(branch_id):
+    orders = (
+        db.session.query(Order.id, Order.status, Order.order_date)
+        .filter(Order.branch_id == branch_id, Order.status.in_(ACTIVE_ORDER_STATUSES))
+        .order_by(Order.order_date)
+        .all()
+    )
+    return [
+        {
+            "order_id": order.id,
+            "status": order.status,
+            "order_date": order.order_date.isoformat(),
+        }
+        for order in orders
+    ]
+
+
+@socketio.on("subscribe", namespace="/order")
+def handle_subscribe(data):
+    branch_id = data.get("branch_id")
+    join_room(branch_room(branch_id), sid=request.sid, namespace="/order")
+    # Clients re-subscribe after every (re)connect, so the snapshot doubles
+    # as a resync for anything missed while disconnected.
+    emit(
+        "order_status_snapshot",
+        {"branch_id": branch_id, "orders": active_orders_snapshot(branch_id)},
+    )
+
+
+@socketio.on("unsubscribe", namespace="/order")
+def handle_unsubscribe(data):
+    leave_room(branch_room(data.get("branch_id")), sid=request.sid, namespace="/order")
@@ -0,0 +1,145 @@
+# server/order_status.py
+from collections import namedtuple
+
+from sqlalchemy import update
+
+from .inventory import release_order_stock
+from .jobs import enqueue_job
+from .models import db, Order
+from .order_feed import order_feed
+
+
+Transition = namedtuple("Transition", ["old_status", "branch_id", "stock_changes"])
+
+RELEASES_STOCK = "Cancelled"
+# Moving a failed payment back to Pending asks the customer to pay again.
+RETRIES_PAYMENT = ("Payment Failed", "Pending")
+
+
+ORDER_TRANSITIONS = {
+    "Pending": ("Paid", "Payment Failed", "Payment Unconfirmed", "Cancelled"),
+    # The STK push may or may not have reached Daraja; staff settle it.
+    "Payment Unconfirmed": ("Paid", "Payment Failed", "Cancelled"),
+    "Payment Failed": ("Pending", "Cancelled"),
+    "Paid": ("Preparing", "Cancelled"),
+    "Preparing": ("Ready", "Cancelled"),
+    "Ready": ("Delivered",),
+    "Delivered": (),
+    "Cancelled": (),
+}
+
+
+class OrderNotFound(Exception):
+    pass
+
+
+class InvalidTransition(Exception):
+    pass
+
+
+class StatusConflict(Exception):
+    pass
+
+
+def check_transition(old_status, new_status):
+    if new_status not in ORDER_TRANSITIONS:
+        raise InvalidTransition(f"Unknown order status: {new_status}")
+    if new_status not in ORDER_TRANSITIONS.get(old_status, ()):
+        raise InvalidTransition(f"Cannot move order from {old_status} to {new_status}")
+
+
+def _status_values(old_status, new_status):
+    if (old_status, new_status) == RETRIES_PAYMENT:
+        return {"status": new_status, "payment_requested_at": None}
+    return {"status": new_status}
+
+
+def _retry_payments(order_ids):
+    for order_id in order_ids:
+        enqueue_job(
+            "order_payment", {"order_id": order_id, "simulate": False}, max_attempts=1
+        )
+
+
+def transition_order_status(order_id, new_status, expected_status=None):
+    """
+    Moves an order to new_status with a single compare-and-set UPDATE and
+    reports what it moved from. Callers that know the status they are
+    moving from skip the read entirely. Cancelling puts the order's stock
+    back and retrying a failed payment queues a new one. Returns a
+    Transition; the caller commits.
+    """
+    old_status = expected_status
+    if old_status is None:
+        old_status = db.session.query(Order.status).filter_by(id=order_id).scalar()
+        if old_status is None:
+            raise OrderNotFound(order_id)
+    check_transition(old_status, new_status)
+
+    updated = db.session.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.status == old_status)
+        .values(**_status_values(old_status, new_status))
+        .returning(Order.branch_id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if updated is None:
+        if db.session.query(Order.id).filter_by(id=order_id).scalar() is None:
+            raise OrderNotFound(order_id)
+        raise StatusConflict(
+            f"Order {order_id} is no longer {old_status}, reload and try again"
+        )
+
+    stock_changes = []
+    if new_status == RELEASES_STOCK:
+        stock_changes = release_order_stock([order_id])
+    if (old_status, new_status) == RETRIES_PAYMENT:
+        _retry_payments([order_id])
+    return Transition(old_status, updated.branch_id, stock_changes)
+
+
+def transition_many(order_ids, new_status):
+    """
+    Moves every listed order that may legally reach new_status in one
+    compare-and-set UPDATE per distinct current status. Returns the applied
+    (order_id, branch_id, old_status) tuples, a {order_id: reason} map of
+    skips and any stock released by cancellations. The caller commits.
+    """
+    if new_status not in ORDER_TRANSITIONS:
+        raise InvalidTransition(f"Unknown order status: {new_status}")
+
+    current = dict(
+        db.session.query(Order.id, Order.status).filter(Order.id.in_(order_ids))
+    )
+    skipped = {order_id: "not found" for order_id in order_ids if order_id not in current}
+
+    by_status = {}
+    for order_id, status in current.items():
+        if new_status in ORDER_TRANSITIONS.get(status, ()):
+            by_status.setdefault(status, []).append(order_id)
+        else:
+            skipped[order_id] = f"cannot move from {status}"
+
+    applied = []
+    for old_status, ids in by_status.items():
+        updated = db.session.execute(
+            update(Order)
+            .where(Order.id.in_(ids), Order.status == old_status)
+            .values(**_status_values(old_status, new_status))
+            .returning(Order.id, Order.branch_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        applied.extend((row.id, row.branch_id, old_status) for row in updated)
+        if (old_status, new_status) == RETRIES_PAYMENT:
+            _retry_payments([row.id for row in updated])
+        for order_id in set(ids) - {row.id for row in updated}:
+            skipped[order_id] = "changed concurrently"
+
+    stock_changes = []
+    if new_status == RELEASES_STOCK and applied:
+        stock_changes = release_order_stock([order_id for order_id, _, _ in applied])
+    return applied, skipped, stock_changes
+
+
+def publish_order_status(order_id, branch_id, old_status, new_status):
+    order_feed.publish(order_id, branch_id, old_status, new_status)
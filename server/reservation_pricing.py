@@ -0,0 +1,161 @@
+# server/reservation_pricing.py
+import threading
+import time
+from decimal import Decimal
+
+from flask import current_app
+
+from .models import db, Branch, DiningTable, ReservationRate
+
+
+# Used wherever no configured rate applies; the original hour bands.
+DEFAULT_RATES = (
+    (0, 12, Decimal("3.00")),
+    (12, 18, Decimal("2.00")),
+    (18, 24, Decimal("1.00")),
+)
+
+HOURS = 24
+WEEKDAYS = 7
+
+
+def _specificity(rate):
+    matched = (rate.branch_id, rate.weekday, rate.table_type)
+    return (
+        sum(value is not None for value in matched),
+        -(rate.end_hour - rate.start_hour),
+        rate.id,
+    )
+
+
+class PricingTable:
+    """
+    Every reservation rate compiled into flat lists indexed by branch,
+    weekday, hour and table type, plus one branch x hour x table type list
+    per holiday. A quote is a couple of dict lookups and one list index.
+
+    Index 0 of the branch and table type axes stands for branches and table
+    types no rate names, which only wildcard rates reach.
+    """
+
+    def __init__(self, rates, branch_ids, table_types):
+        self.branch_index = {None: 0}
+        for branch_id in sorted(branch_ids | {r.branch_id for r in rates} - {None}):
+            self.branch_index[branch_id] = len(self.branch_index)
+        self.type_index = {None: 0}
+        for table_type in sorted(table_types | {r.table_type for r in rates} - {None}):
+            self.type_index[table_type] = len(self.type_index)
+        self.built_at = time.monotonic()
+
+        n_types = len(self.type_index)
+        hour_prices = [None] * HOURS
+        for start_hour, end_hour, price in DEFAULT_RATES:
+            hour_prices[start_hour:end_hour] = [price] * (end_hour - start_hour)
+        self.weekly = [
+            hour_prices[hour]
+            for _ in range(len(self.branch_index) * WEEKDAYS)
+            for hour in range(HOURS)
+            for _ in range(n_types)
+        ]
+
+        rates = sorted(rates, key=_specificity)
+        for rate in rates:
+            if rate.holiday is None:
+                weekdays = range(WEEKDAYS) if rate.weekday is None else (rate.weekday,)
+                for weekday in weekdays:
+                    self._apply(self.weekly, rate, weekday)
+
+        self.holidays = {}
+        for rate in rates:
+            if rate.holiday is None:
+                continue
+            layer = self.holidays.get(rate.holiday)
+            if layer is None:
+                layer = self.holidays[rate.holiday] = self._weekday_layer(
+                    rate.holiday.weekday()
+                )
+            self._apply(layer, rate, None)
+
+    def _branches(self, rate):
+        if rate.branch_id is None:
+            return self.branch_index.values()
+        return (self.branch_index[rate.branch_id],)
+
+    def _types(self, rate):
+        if rate.table_type is None:
+            return self.type_index.values()
+        return (self.type_index[rate.table_type],)
+
+    def _apply(self, prices, rate, weekday):
+        n_types = len(self.type_index)
+        for branch in self._branches(rate):
+            day = branch if weekday is None else branch * WEEKDAYS + weekday
+            for hour in range(max(rate.start_hour, 0), min(rate.end_hour, HOURS)):
+                base = (day * HOURS + hour) * n_types
+                for table_type in self._types(rate):
+                    prices[base + table_type] = rate.price
+
+    def _weekday_layer(self, weekday):
+        # A holiday starts from that weekday's prices so rates covering only
+        # part of the day leave the other hours alone.
+        size = HOURS * len(self.type_index)
+        layer = []
+        for branch in range(len(self.branch_index)):
+            start = (branch * WEEKDAYS + weekday) * size
+            layer.extend(self.weekly[start:start + size])
+        return layer
+
+    def quote(self, branch_id, starts_at, table_type=None):
+        branch = self.branch_index.get(branch_id, 0)
+        table_type = self.type_index.get(table_type, 0)
+        n_types = len(self.type_index)
+        holiday = self.holidays.get(starts_at.date())
+        if holiday is not None:
+            return holiday[(branch * HOURS + starts_at.hour) * n_types + table_type]
+        day = branch * WEEKDAYS + starts_at.weekday()
+        return self.weekly[(day * HOURS + starts_at.hour) * n_types + table_type]
+
+
+def compile_pricing():
+    branch_ids = {branch_id for branch_id, in db.session.query(Branch.id)}
+    table_types = {
+        table_type for table_type, in db.session.query(DiningTable.table_type).distinct()
+    }
+    return PricingTable(ReservationRate.query.all(), branch_ids, table_types)
+
+
+class PricingCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._table = None
+        self._generation = 0
+
+    def get(self):
+        table = self._table
+        if table is not None and not self._expired(table):
+            return table
+
+        with self._lock:
+            table = self._table
+            if table is not None and not self._expired(table):
+                return table
+            generation = self._generation
+            table = compile_pricing()
+            if generation == self._generation:
+                self._table = table
+            return table
+
+    def invalidate(self):
+        self._generation += 1
+        self._table = None
+
+    def _expired(self, table):
+        ttl = current_app.config.get("RESERVATION_PRICING_TTL")
+        return bool(ttl) and time.monotonic() - table.built_at > ttl
+
+
+pricing_cache = PricingCache()
+
+
+def quote_reservation(branch_id, starts_at, table_type=None):
+    return pricing_cache.get().quote(branch_id, starts_at, table_type)
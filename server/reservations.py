@@ -0,0 +1,248 @@
+# server/reservations.py
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import exists, insert, literal, select
+
+from .models import db, DiningTable, Reservation
+
+
+AVAILABILITY_CACHE_SIZE = 256
+
+
+def clock_minutes(value):
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def format_minutes(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class DayBookings:
+    """
+    One branch's reservations for one day as per-table (start, end) minute
+    intervals sorted by start, with a running maximum of the ends. A stay
+    clashes only if some booking starting before it ends is still running
+    when it starts, so every overlap test is one bisect.
+    """
+
+    def __init__(self, intervals):
+        self.starts = {}
+        self.max_ends = {}
+        for table_number, start, end in sorted(intervals):
+            starts = self.starts.setdefault(table_number, [])
+            max_ends = self.max_ends.setdefault(table_number, [])
+            starts.append(start)
+            max_ends.append(max(end, max_ends[-1]) if max_ends else end)
+        self.built_at = time.monotonic()
+
+    def is_free(self, table_number, start, end):
+        starts = self.starts.get(table_number)
+        if not starts:
+            return True
+        before = bisect_left(starts, end)
+        return before == 0 or self.max_ends[table_number][before - 1] <= start
+
+
+def _overlapping(branch_id, start, end):
+    # Bookings can't last longer than the configured maximum, which bounds
+    # the index range scanned on reservation_date.
+    earliest = start - timedelta(
+        minutes=current_app.config["RESERVATION_MAX_DURATION_MINUTES"]
+    )
+    return (
+        Reservation.branch_id == branch_id,
+        Reservation.reservation_date > earliest,
+        Reservation.reservation_date < end,
+        Reservation.ends_at > start,
+        Reservation.status != "Cancelled",
+    )
+
+
+def load_day_bookings(branch_id, day):
+    day_start = datetime.combine(day, datetime.min.time())
+    rows = db.session.execute(
+        select(
+            Reservation.table_number, Reservation.reservation_date, Reservation.ends_at
+        ).where(*_overlapping(branch_id, day_start, day_start + timedelta(days=1)))
+    )
+    return DayBookings(
+        (
+            table_number,
+            int((starts_at - day_start).total_seconds() // 60),
+            int((ends_at - day_start).total_seconds() // 60),
+        )
+        for table_number, starts_at, ends_at in rows
+    )
+
+
+class AvailabilityCache:
+    """
+    LRU of DayBookings keyed by (branch_id, day). Bookings made by this
+    process invalidate their day straight away; the TTL bounds how stale a
+    day can get from bookings made elsewhere. The booking path never relies
+    on it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._days = OrderedDict()
+        self._generation = 0
+
+    def get(self, branch_id, day):
+        key = (branch_id, day)
+        ttl = current_app.config["RESERVATION_CACHE_TTL"]
+        with self._lock:
+            bookings = self._days.get(key)
+            if bookings is not None and time.monotonic() - bookings.built_at < ttl:
+                self._days.move_to_end(key)
+                return bookings
+            generation = self._generation
+
+        bookings = load_day_bookings(branch_id, day)
+        with self._lock:
+            # Don't publish a day that a booking may have changed meanwhile.
+            if generation == self._generation:
+                self._days[key] = bookings
+                self._days.move_to_end(key)
+                while len(self._days) > AVAILABILITY_CACHE_SIZE:
+                    self._days.popitem(last=False)
+        return bookings
+
+    def invalidate(self, branch_id, *days):
+        with self._lock:
+            self._generation += 1
+            for day in days:
+                self._days.pop((branch_id, day), None)
+
+
+availability_cache = AvailabilityCache()
+
+
+def default_table(branch_id, table_number):
+    """
+    A transient DiningTable from the default layout, which stands in for a
+    branch (or branch_id None) that has no tables configured. None if the
+    number is outside it.
+    """
+    config = current_app.config
+    if not 1 <= table_number <= config["RESERVATION_DEFAULT_TABLES"]:
+        return None
+    return DiningTable(
+        branch_id=branch_id,
+        table_number=table_number,
+        seats=config["RESERVATION_DEFAULT_TABLE_SEATS"],
+        table_type="standard",
+    )
+
+
+def tables_for_party(branch_id, party_size):
+    tables = (
+        db.session.query(DiningTable.table_number, DiningTable.seats)
+        .filter(DiningTable.branch_id == branch_id, DiningTable.seats >= party_size)
+        .order_by(DiningTable.seats, DiningTable.table_number)
+        .all()
+    )
+    if tables or branch_has_tables(branch_id):
+        return tables
+
+    config = current_app.config
+    seats = config["RESERVATION_DEFAULT_TABLE_SEATS"]
+    if seats < party_size:
+        return []
+    return [
+        (table_number, seats)
+        for table_number in range(1, config["RESERVATION_DEFAULT_TABLES"] + 1)
+    ]
+
+
+def available_slots(branch_id, day, party_size, duration):
+    """
+    Lists every start time on `day` with at least one table that seats the
+    party and is free for the whole stay, smallest suitable tables first.
+    """
+    config = current_app.config
+    opening = clock_minutes(config["RESERVATION_OPENING_TIME"])
+    closing = clock_minutes(config["RESERVATION_CLOSING_TIME"])
+    step = config["RESERVATION_SLOT_MINUTES"]
+
+    now = datetime.now()
+    if day < now.date():
+        return []
+    if day == now.date():
+        # Start from the next slot boundary that hasn't passed yet.
+        elapsed = now.hour * 60 + now.minute
+        opening += max(0, math.ceil((elapsed - opening) / step)) * step
+
+    tables = tables_for_party(branch_id, party_size)
+    if not tables:
+        return []
+    bookings = availability_cache.get(branch_id, day)
+
+    slots = []
+    for start in range(opening, closing - duration + 1, step):
+        free = [
+            table_number
+            for table_number, _ in tables
+            if bookings.is_free(table_number, start, start + duration)
+        ]
+        if free:
+            slots.append({"time": format_minutes(start), "tables": free})
+    return slots
+
+
+def book_table(values):
+    """
+    Inserts a reservation only if its table is free for the whole stay, as
+    one INSERT ... SELECT ... WHERE NOT EXISTS, so overlapping requests can't
+    both land. Returns the new reservation id, or None if the table is
+    taken. The caller commits.
+    """
+    clash = select(Reservation.id).where(
+        Reservation.table_number == values["table_number"],
+        *_overlapping(values["branch_id"], values["reservation_date"], values["ends_at"]),
+    )
+    table = Reservation.__table__
+    columns = list(values)
+    row = select(*(literal(values[name], table.c[name].type) for name in columns))
+    return db.session.execute(
+        insert(table)
+        .from_select(columns, row.where(~exists(clash)))
+        .returning(table.c.id)
+    ).scalar()
+
+
+def lock_table(branch_id, table_number):
+    """
+    Returns the DiningTable row, locked for the rest of the transaction where
+    the database supports it so bookings for one table run one at a time.
+    """
+    return (
+        DiningTable.query.filter_by(branch_id=branch_id, table_number=table_number)
+        .with_for_update()
+        .first()
+    )
+
+
+def find_table(branch_id, table_number):
+    """
+    The table a booking is for: the configured row, locked, or the default
+    layout's table if the branch has none configured. None if there is no
+    such table.
+    """
+    table = lock_table(branch_id, table_number)
+    if table is None and not branch_has_tables(branch_id):
+        table = default_table(branch_id, table_number)
+    return table
+
+
+def branch_has_tables(branch_id):
+    return db.session.query(
+        exists().where(DiningTable.branch_id == branch_id)
+    ).scalar()
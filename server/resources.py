@@ -1,10 +1,42 @@
 # server/resources.py
-from flask import jsonify, request
+from flask import jsonify, request, Response
 from twilio.base.exceptions import TwilioRestException
 from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
 from flask_socketio import emit
 from server.app import socketio, db, mail
-from .utils import create_mpesa_transaction
+from .utils import create_mpesa_transaction, dialect_insert
+from .jobs import enqueue_job, job_handler
+from .daraja_client import DarajaUnavailable
+from .idempotency import idempotent
+from .archive import load_archived_order
+from .forecast import reorder_suggestions
+from .reservations import (
+    availability_cache,
+    available_slots,
+    book_table,
+    find_table,
+)
+from .reservation_pricing import pricing_cache, quote_reservation
+from .inventory import (
+    ADJUSTMENT_REASONS,
+    OutOfStock,
+    apply_stock_deltas,
+    publish_stock_changes,
+    reserve_order_stock,
+    set_stock_levels,
+)
+from .order_status import (
+    InvalidTransition,
+    OrderNotFound,
+    StatusConflict,
+    publish_order_status,
+    transition_many,
+    transition_order_status,
+)
+from .menu_cache import menu_cache, menu_columns, serialize_menu_rows
+from .menu_search import search_menu
+from .menu_sync import current_menu_version
+from .menu_import import import_menu_items, iter_csv_rows, iter_json_lines
 from flask_restful import Resource, reqparse
 from jinja2 import Environment, FileSystemLoader
 from .models import (
@@ -13,15 +45,24 @@ from .models import (
     Order,
     OrderItem,
     MenuItem,
+    MenuItemTombstone,
     Reservation,
+    ReservationRate,
+    DiningTable,
     Inventory,
+    InventoryMovement,
     Cart,
     CartItem,
     MpesaTransaction,
     Branch,
+    ArchivedOrder,
+    ArchivedOrderItem,
 )
-from datetime import datetime, time
+from sqlalchemy import exists, func, insert, literal, select, tuple_, update
+from sqlalchemy.orm import selectinload
+from datetime import datetime, time, timedelta
 from .mpesa import (
+    get_mpesa_access_token,
     lipa_na_mpesa_online,
     simulate_mpesa_callback,
     initiate_mpesa_transaction,
@@ -32,8 +73,11 @@ import os
 import logging
 from flask import current_app
 import re
+import base64
 from flask_mail import Message
 from smtplib import SMTPException
+from sqlalchemy.exc import SQLAlchemyError
+import requests
 
 
 class HomeResource(Resource):
@@ -107,21 +151,157 @@ class UserLogin(Resource):
         else:
             return {"message": "Invalid username, email, or password"}, 401
         
+MENU_PAGE_SIZE = 50
+MENU_MAX_PAGE_SIZE = 200
+
+
 class Menu(Resource):
+    listing_args = (
+        "category",
+        "branch_id",
+        "min_price",
+        "max_price",
+        "min_rating",
+        "cursor",
+        "limit",
+    )
+
+    def get(self):
+        if any(arg in request.args for arg in self.listing_args):
+            return self.get_page()
+
+        snapshot = menu_cache.get()
+        response = Response(snapshot.body, mimetype="application/json")
+        response.set_etag(snapshot.etag)
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Menu-Version"] = str(snapshot.version)
+        return response.make_conditional(request)
+
+    def get_page(self):
+        parser = reqparse.RequestParser()
+        parser.add_argument("category", type=str, location="args")
+        parser.add_argument("branch_id", type=int, location="args")
+        parser.add_argument("min_price", type=float, location="args")
+        parser.add_argument("max_price", type=float, location="args")
+        parser.add_argument("min_rating", type=int, location="args")
+        parser.add_argument(
+            "cursor", type=int, location="args", help="Cursor must be a menu item ID"
+        )
+        parser.add_argument("limit", type=int, location="args", default=MENU_PAGE_SIZE)
+        args = parser.parse_args()
+
+        limit = max(1, min(args["limit"] or MENU_PAGE_SIZE, MENU_MAX_PAGE_SIZE))
+
+        query = db.session.query(*menu_columns())
+        if args["branch_id"] is not None:
+            query = query.filter(MenuItem.branch_id == args["branch_id"])
+        if args["category"]:
+            query = query.filter(MenuItem.category == args["category"])
+        if args["min_price"] is not None:
+            query = query.filter(MenuItem.price >= args["min_price"])
+        if args["max_price"] is not None:
+            query = query.filter(MenuItem.price <= args["max_price"])
+        if args["min_rating"] is not None:
+            query = query.filter(MenuItem.rating >= args["min_rating"])
+        if args["cursor"] is not None:
+            query = query.filter(MenuItem.id > args["cursor"])
+
+        # Fetch one extra row to know whether another page exists.
+        rows = query.order_by(MenuItem.id).limit(limit + 1).all()
+        page = rows[:limit]
+        next_cursor = page[-1].id if len(rows) > limit else None
+
+        return jsonify({"items": serialize_menu_rows(page), "next_cursor": next_cursor})
+
+
+class MenuChanges(Resource):
     def get(self):
-        menu = MenuItem.query.all()
-        menu_list = []
-        for item in menu:
-            menu_list.append({
-                'id': item.id,
-                'name': item.name,
-                'description': item.description,
-                'category': item.category,
-                'rating': item.rating,
-                'price': item.price,
-                'image_url': item.image_url,
-            })
-        return jsonify(menu_list)
+        parser = reqparse.RequestParser()
+        parser.add_argument(
+            "since",
+            type=int,
+            required=True,
+            location="args",
+            help="Menu version to sync from is required",
+        )
+        args = parser.parse_args()
+        since = args["since"]
+
+        version = current_menu_version()
+        upserted = (
+            db.session.query(*menu_columns())
+            .filter(MenuItem.version > since)
+            .order_by(MenuItem.version, MenuItem.id)
+            .all()
+        )
+        # SQLite may hand a deleted id to a new row, so a tombstone only
+        # counts if the id wasn't re-created afterwards.
+        live_ids = {row.id for row in upserted}
+        deleted = [
+            menu_item_id
+            for (menu_item_id,) in db.session.query(MenuItemTombstone.menu_item_id)
+            .filter(MenuItemTombstone.version > since)
+            .distinct()
+            if menu_item_id not in live_ids
+        ]
+
+        return jsonify(
+            {
+                "version": version,
+                "upserted": serialize_menu_rows(upserted),
+                "deleted": deleted,
+            }
+        )
+
+
+class MenuImport(Resource):
+    json_lines_mimetypes = ("application/x-ndjson", "application/jsonl")
+
+    @jwt_required()
+    def post(self):
+        current_user = User.query.get(get_jwt_identity())
+        if not current_user or current_user.role not in STAFF_ROLES:
+            return {"message": "Only staff can import menu items"}, 403
+
+        if request.mimetype == "text/csv":
+            rows = iter_csv_rows(request.stream)
+        elif request.mimetype in self.json_lines_mimetypes:
+            rows = iter_json_lines(request.stream)
+        else:
+            return {
+                "message": "Send menu items as text/csv or application/x-ndjson"
+            }, 415
+
+        try:
+            report = import_menu_items(rows)
+        except UnicodeDecodeError:
+            return {"message": "Import body must be UTF-8 encoded"}, 400
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Menu import failed: {e}")
+            return {"message": "Menu import failed, no items were saved"}, 500
+
+        menu_cache.invalidate()
+        return report
+
+
+MENU_SEARCH_LIMIT = 20
+MENU_MAX_SEARCH_LIMIT = 100
+
+
+class MenuSearch(Resource):
+    def get(self):
+        parser = reqparse.RequestParser()
+        parser.add_argument(
+            "q", type=str, required=True, location="args", help="Search query is required"
+        )
+        parser.add_argument(
+            "limit", type=int, location="args", default=MENU_SEARCH_LIMIT
+        )
+        args = parser.parse_args()
+
+        limit = max(1, min(args["limit"] or MENU_SEARCH_LIMIT, MENU_MAX_SEARCH_LIMIT))
+        rows = search_menu(args["q"], limit)
+        return jsonify(serialize_menu_rows(rows))
 
 
 class MenuItemResource(Resource):
@@ -163,6 +343,7 @@ class MenuItemResource(Resource):
         )
         db.session.add(menu_item)
         db.session.commit()
+        menu_cache.invalidate()
 
         return {
             "message": "Menu item created successfully",
@@ -194,6 +375,7 @@ class MenuItemResource(Resource):
             menu_item.branch_id = args["branch_id"]
 
         db.session.commit()
+        menu_cache.invalidate()
         return {"message": "Menu item updated successfully"}
 
     def delete(self, menu_item_id):
@@ -203,14 +385,152 @@ class MenuItemResource(Resource):
 
         db.session.delete(menu_item)
         db.session.commit()
+        menu_cache.invalidate()
         return {"message": "Menu item deleted successfully"}
 
 
+def load_cart(user_id):
+    return (
+        Cart.query.options(selectinload(Cart.items).joinedload(CartItem.menu_item))
+        .filter_by(user_id=user_id)
+        .first()
+    )
+
+
+def load_order(order_id):
+    return Order.query.options(
+        selectinload(Order.order_items).joinedload(OrderItem.menu_item)
+    ).get(order_id)
+
+
+def ensure_cart(user_id):
+    db.session.execute(
+        dialect_insert(Cart)
+        .values(user_id=user_id)
+        .on_conflict_do_nothing(index_elements=[Cart.user_id])
+    )
+
+
+def user_cart_id(user_id):
+    return select(Cart.id).where(Cart.user_id == user_id).scalar_subquery()
+
+
+def add_to_cart(user_id, menu_item_id, quantity):
+    """
+    Adds quantity of a menu item to the user's cart, creating the cart and
+    the line as needed. The unique (cart_id, menu_item_id) constraint lets
+    concurrent adds merge into one line instead of racing.
+    """
+    ensure_cart(user_id)
+    statement = dialect_insert(CartItem).values(
+        cart_id=user_cart_id(user_id), menu_item_id=menu_item_id, quantity=quantity
+    )
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[CartItem.cart_id, CartItem.menu_item_id],
+            set_={"quantity": CartItem.quantity + statement.excluded.quantity},
+        )
+    )
+
+
+CART_BATCH_OPS = ("set", "add", "remove")
+
+
+def plan_cart_changes(changes):
+    """
+    Folds a list of {menu_item_id, quantity, op} changes into one final
+    action per menu item, so each action can be applied as a single
+    set-based statement regardless of how often an item is repeated.
+    """
+    plan = {}
+    for change in changes:
+        if not isinstance(change, dict):
+            raise ValueError("Each change must be an object")
+        menu_item_id = change.get("menu_item_id")
+        op = change.get("op", "add")
+        quantity = change.get("quantity", 1)
+        if not isinstance(menu_item_id, int):
+            raise ValueError("menu_item_id must be an integer")
+        if op not in CART_BATCH_OPS:
+            raise ValueError(f"op must be one of {', '.join(CART_BATCH_OPS)}")
+        if op != "remove" and (not isinstance(quantity, int) or quantity < 0):
+            raise ValueError("quantity must be a non-negative integer")
+
+        previous = plan.get(menu_item_id)
+        if op == "remove" or (op == "set" and quantity == 0):
+            plan[menu_item_id] = ("remove", 0)
+        elif op == "add" and previous and previous[0] == "set":
+            plan[menu_item_id] = ("set", previous[1] + quantity)
+        elif op == "add" and previous and previous[0] == "remove":
+            plan[menu_item_id] = ("set", quantity)
+        elif op == "add" and previous:
+            plan[menu_item_id] = ("add", previous[1] + quantity)
+        else:
+            plan[menu_item_id] = (op, quantity)
+    return plan
+
+
+def apply_cart_changes(user_id, plan):
+    ensure_cart(user_id)
+
+    removed = [item_id for item_id, (op, _) in plan.items() if op == "remove"]
+    if removed:
+        CartItem.query.filter(
+            CartItem.cart_id == user_cart_id(user_id),
+            CartItem.menu_item_id.in_(removed),
+        ).delete(synchronize_session=False)
+
+    for op in ("set", "add"):
+        rows = [
+            {"menu_item_id": item_id, "quantity": quantity}
+            for item_id, (item_op, quantity) in plan.items()
+            if item_op == op and quantity > 0
+        ]
+        if not rows:
+            continue
+        statement = dialect_insert(CartItem).values(cart_id=user_cart_id(user_id))
+        quantity = statement.excluded.quantity
+        if op == "add":
+            quantity = CartItem.quantity + quantity
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[CartItem.cart_id, CartItem.menu_item_id],
+                set_={"quantity": quantity},
+            ),
+            rows,
+        )
+
+
+def cart_summary(user_id):
+    rows = (
+        db.session.query(
+            MenuItem.id, MenuItem.name, MenuItem.price, CartItem.quantity
+        )
+        .join(CartItem, CartItem.menu_item_id == MenuItem.id)
+        .join(Cart, Cart.id == CartItem.cart_id)
+        .filter(Cart.user_id == user_id)
+        .order_by(CartItem.id)
+        .all()
+    )
+    items = [
+        {
+            "id": row.id,
+            "name": row.name,
+            "price": str(row.price),
+            "quantity": row.quantity,
+            "line_total": str(row.price * row.quantity),
+        }
+        for row in rows
+    ]
+    total = sum((row.price * row.quantity for row in rows), Decimal(0))
+    return {"items": items, "total": str(total)}
+
+
 class CartResource(Resource):
     @jwt_required()
     def get(self):
         current_user_id = get_jwt_identity()
-        user_cart = Cart.query.filter_by(user_id=current_user_id).first()
+        user_cart = load_cart(current_user_id)
         if not user_cart:
             return {"message": "Cart is empty"}
 
@@ -227,26 +547,45 @@ class CartResource(Resource):
     @jwt_required()
     def post(self, menu_item_id):
         current_user_id = get_jwt_identity()
-        user_cart = Cart.query.filter_by(user_id=current_user_id).first()
-        if not user_cart:
-            user_cart = Cart(user_id=current_user_id)
-            db.session.add(user_cart)
-            db.session.commit()
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return {"message": "Request body must be a JSON object"}, 400
+        quantity = data.get("quantity", 1)
+        if not isinstance(quantity, int) or quantity < 1:
+            return {"message": "Quantity must be a positive integer"}, 400
+
+        add_to_cart(current_user_id, menu_item_id, quantity)
+        db.session.commit()
+        return {"message": "Item added to cart successfully"}
 
-        quantity = request.json.get("quantity", 1)
-        cart_item = CartItem.query.filter_by(
-            cart_id=user_cart.id, menu_item_id=menu_item_id
-        ).first()
-        if cart_item:
-            cart_item.quantity += quantity
-        else:
-            cart_item = CartItem(
-                cart_id=user_cart.id, menu_item_id=menu_item_id, quantity=quantity
+    @jwt_required()
+    def patch(self):
+        current_user_id = get_jwt_identity()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return {"message": "Request body must be a JSON object"}, 400
+        changes = data.get("changes")
+        if not isinstance(changes, list) or not changes:
+            return {"message": "A non-empty list of changes is required"}, 400
+
+        try:
+            plan = plan_cart_changes(changes)
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+        found = {
+            menu_item_id
+            for (menu_item_id,) in db.session.query(MenuItem.id).filter(
+                MenuItem.id.in_(list(plan))
             )
-            db.session.add(cart_item)
+        }
+        missing = sorted(set(plan) - found)
+        if missing:
+            return {"message": "Menu items not found", "menu_item_ids": missing}, 404
 
+        apply_cart_changes(current_user_id, plan)
         db.session.commit()
-        return {"message": "Item added to cart successfully"}
+        return cart_summary(current_user_id)
 
     @jwt_required()
     def delete(self, menu_item_id):
@@ -266,36 +605,131 @@ class CartResource(Resource):
         return {"message": "Item removed from cart successfully"}
 
 
+def serialize_order(order):
+    order_items = [
+        {
+            "id": item.id,
+            "menu_item_id": item.menu_item_id,
+            "quantity": item.quantity,
+            "menu_item_name": item.menu_item.name,
+            "menu_item_price": str(
+                item.unit_price
+                if item.unit_price is not None
+                else item.menu_item.price
+            ),
+            "line_total": str(item.line_total)
+            if item.line_total is not None
+            else None,
+        }
+        for item in order.order_items
+    ]
+
+    return {
+        "id": order.id,
+        "user_id_order": order.user_id_order,
+        "order_date": order.order_date.isoformat(),
+        "status": order.status,
+        "total_amount": str(order.total_amount)
+        if order.total_amount is not None
+        else None,
+        "order_items": order_items,
+    }
+
+
+def encode_order_cursor(order):
+    raw = f"{order.order_date.isoformat()}|{order.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_order_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    order_date, order_id = raw.split("|")
+    return datetime.fromisoformat(order_date), int(order_id)
+
+
+ORDER_PAGE_SIZE = 20
+ORDER_MAX_PAGE_SIZE = 100
+STAFF_ROLES = ("admin", "staff")
+
+
 class OrderResource(Resource):
-    def get(self, order_id):
-        order = Order.query.get(order_id)
-        if not order:
+    def get(self, order_id=None):
+        if order_id is None:
+            return self.list_orders()
+
+        order = load_order(order_id)
+        if order:
+            return serialize_order(order)
+
+        archived_order = load_archived_order(order_id)
+        if not archived_order:
             return {"message": "Order not found"}, 404
+        return dict(serialize_order(archived_order), archived=True)
 
-        order_items = [
-            {
-                "id": item.id,
-                "menu_item_id": item.menu_item_id,
-                "quantity": item.quantity,
-                "menu_item_name": item.menu_item.name,
-                "menu_item_price": str(item.menu_item.price),
-            }
-            for item in order.order_items
-        ]
+    @jwt_required()
+    def list_orders(self):
+        parser = reqparse.RequestParser()
+        parser.add_argument("user", type=int, location="args")
+        parser.add_argument("status", type=str, location="args")
+        parser.add_argument("before", type=str, location="args")
+        parser.add_argument("limit", type=int, location="args", default=ORDER_PAGE_SIZE)
+        args = parser.parse_args()
+
+        current_user_id = get_jwt_identity()
+        user_id = args["user"] or current_user_id
+        if user_id != current_user_id:
+            current_user = User.query.get(current_user_id)
+            if not current_user or current_user.role not in STAFF_ROLES:
+                return {"message": "Not allowed to view these orders"}, 403
+
+        limit = max(1, min(args["limit"] or ORDER_PAGE_SIZE, ORDER_MAX_PAGE_SIZE))
+
+        before = None
+        if args["before"]:
+            try:
+                before = decode_order_cursor(args["before"])
+            except (ValueError, UnicodeDecodeError):
+                return {"message": "Invalid cursor"}, 400
+
+        # Archiving moves old orders out of the live table, and an old order
+        # that is still live can sort between archived ones, so each page
+        # merges the next rows of both tables. Ids never collide across them.
+        orders = []
+        for model, item_model in ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem)):
+            query = model.query.options(
+                selectinload(model.order_items).joinedload(item_model.menu_item)
+            ).filter(model.user_id_order == user_id)
+            if args["status"]:
+                query = query.filter(model.status == args["status"])
+            if before:
+                query = query.filter(tuple_(model.order_date, model.id) < before)
+            # Fetch one extra row to know whether another page exists.
+            orders.extend(
+                query.order_by(model.order_date.desc(), model.id.desc())
+                .limit(limit + 1)
+                .all()
+            )
+        orders.sort(key=lambda order: (order.order_date, order.id), reverse=True)
+
+        page = orders[:limit]
+        next_cursor = encode_order_cursor(page[-1]) if len(orders) > limit else None
 
         return {
-            "id": order.id,
-            "user_id_order": order.user_id_order,
-            "order_date": order.order_date.isoformat(),
-            "status": order.status,
-            "order_items": order_items,
+            "orders": [
+                dict(serialize_order(order), archived=True)
+                if isinstance(order, ArchivedOrder)
+                else serialize_order(order)
+                for order in page
+            ],
+            "next_cursor": next_cursor,
         }
 
     @jwt_required()
+    @idempotent
     def post(self):
         current_user_id = get_jwt_identity()
-        user_cart = Cart.query.filter_by(user_id=current_user_id).first()
-        if not user_cart:
+        cart_id = db.session.query(Cart.id).filter_by(user_id=current_user_id).scalar()
+        if not cart_id:
             return {"message": "Cart is empty"}, 400
 
         parser = reqparse.RequestParser()
@@ -314,16 +748,18 @@ class OrderResource(Resource):
         )
         args = parser.parse_args()
 
-        total_amount = Decimal(0.00)
-        order_items = []
-        for cart_item in user_cart.items:
-            order_items.append(
-                OrderItem(
-                    menu_item_id=cart_item.menu_item_id, quantity=cart_item.quantity
-                )
+        line_count, total_amount, branch_id = (
+            db.session.query(
+                func.count(CartItem.id),
+                func.sum(MenuItem.price * CartItem.quantity, type_=MenuItem.price.type),
+                func.min(MenuItem.branch_id),
             )
-
-            total_amount += cart_item.menu_item.price * cart_item.quantity
+            .join(MenuItem, MenuItem.id == CartItem.menu_item_id)
+            .filter(CartItem.cart_id == cart_id)
+            .one()
+        )
+        if not line_count:
+            return {"message": "Cart is empty"}, 400
         current_app.logger.info(f"Total amount calculated: {total_amount}")
 
         if total_amount < Decimal(0) or total_amount > Decimal(70000):
@@ -339,49 +775,54 @@ class OrderResource(Resource):
             order_date=datetime.utcnow(),
             status="Pending",
             phone_number=args["phone_number"],
+            total_amount=total_amount,
+            branch_id=branch_id,
         )
-        order.order_items = order_items
         db.session.add(order)
-        db.session.commit()
-
-        user = User.query.get(current_user_id)
-        if not user:
-            return {"message": "User not found"}, 404
-
-        payment_response = initiate_mpesa_transaction(
-            args["phone_number"],
-            total_amount,
-            order.id,
-            simulate=args["simulate"],
-        )
-
-        if args["simulate"]:
-            simulate_mpesa_callback(payment_response)
-
-        if payment_response.get("ResponseCode") == "0":
-            create_mpesa_transaction(
-                payment_response, total_amount, args["phone_number"], order_id=order.id
-            )
-
-            CartItem.query.filter_by(cart_id=user_cart.id).delete()
-            db.session.commit()
-
-            forwarding_number = self.get_forwarding_number(order.id)
-            self.send_order_confirmation_sms(
-                order.id, args["phone_number"], forwarding_number
+        db.session.flush()
+
+        # Order lines are copied straight from the cart with the prices paid,
+        # so later reads and reports don't depend on today's menu prices.
+        db.session.execute(
+            insert(OrderItem).from_select(
+                ["order_id", "menu_item_id", "quantity", "unit_price", "line_total"],
+                select(
+                    literal(order.id),
+                    CartItem.menu_item_id,
+                    CartItem.quantity,
+                    MenuItem.price,
+                    MenuItem.price * CartItem.quantity,
+                )
+                .join(MenuItem, MenuItem.id == CartItem.menu_item_id)
+                .where(CartItem.cart_id == cart_id),
             )
-            self.send_order_confirmation_email(order.id, user.email)
+        )
 
+        try:
+            stock_changes = reserve_order_stock(order.id)
+        except OutOfStock as e:
+            db.session.rollback()
             return {
-                "message": "Order created and payment initiated successfully",
-                "order_id": order.id,
-            }, 201
-        else:
-            return {
-                "message": "Order created but payment failed",
-                "order_id": order.id,
-                "payment_error": payment_response,
-            }, 400
+                "message": "Some items in your cart are out of stock",
+                "inventory_ids": e.inventory_ids,
+            }, 409
+
+        # The order, its items, the emptied cart and the payment job are
+        # committed together; M-Pesa and notifications run on job workers.
+        CartItem.query.filter_by(cart_id=cart_id).delete()
+        enqueue_job(
+            "order_payment",
+            {"order_id": order.id, "simulate": args["simulate"]},
+            max_attempts=1,
+        )
+        db.session.commit()
+        publish_stock_changes(stock_changes)
+
+        return {
+            "message": "Order received, payment is being processed",
+            "order_id": order.id,
+            "status_url": f"/api/orders/{order.id}/status",
+        }, 202
 
     def get_forwarding_number(self, order_id):
         mpesa_transaction = MpesaTransaction.query.filter_by(order_id=order_id).first()
@@ -389,11 +830,7 @@ class OrderResource(Resource):
             return mpesa_transaction.phone_number
         return None
 
-    def send_order_confirmation_sms(self, order_id, phone_number, forwarding_number):
-        order = Order.query.get(order_id)
-        if not order:
-            return
-
+    def send_order_confirmation_sms(self, order, phone_number, forwarding_number):
         order_summary = "\n".join(
             [f"{item.menu_item.name} (x{item.quantity})" for item in order.order_items]
         )
@@ -438,20 +875,12 @@ class OrderResource(Resource):
     def validate_phone_number(self, phone_number):
         return re.match(r"^\+?[1-9]\d{1,14}$", phone_number) is not None
 
-    def send_order_confirmation_email(self, order_id, email):
-        order = Order.query.get(order_id)
-        if not order:
-            return
-
+    def send_order_confirmation_email(self, order, user):
         template_loader = FileSystemLoader(searchpath=os.path.join(current_app.root_path,'email_templates'))
         template_env = Environment(loader=template_loader)
         template = template_env.get_template('order_confirmation_email.html')
 
-        user = User.query.filter_by(email=email).first()
-        if not user:
-            return "User not found"
-
-        customer_name = user.username
+        customer_name = f"{user.firstname} {user.lastname}"
         order_items_html = "\n".join(
             f"<li>{item.menu_item.name} (Quantity: {item.quantity})</li>"
             for item in order.order_items
@@ -463,7 +892,7 @@ class OrderResource(Resource):
 
         subject = f"Order Confirmation - Order ID: {order.id}"
 
-        msg = Message(subject, recipients=[email])
+        msg = Message(subject, recipients=[user.email])
         msg.html= message_body
 
         try:
@@ -479,17 +908,15 @@ class OrderResource(Resource):
     def put(self, order_id):
         parser = reqparse.RequestParser()
         parser.add_argument("status", type=str, required=False)
+        parser.add_argument("from_status", type=str, required=False)
         args = parser.parse_args()
 
-        order = Order.query.get(order_id)
-        if not order:
-            return {"message": "Order not found"}, 404
-
-        if args["status"]:
-            order.status = args["status"]
+        if not args["status"]:
+            if not Order.query.get(order_id):
+                return {"message": "Order not found"}, 404
+            return {"message": "Order updated successfully"}
 
-        db.session.commit()
-        return {"message": "Order updated successfully"}
+        return self.change_status(order_id, args["status"], args["from_status"])
 
     def delete(self, order_id):
         order = Order.query.get(order_id)
@@ -511,27 +938,175 @@ class OrderResource(Resource):
         parser.add_argument(
             "status", type=str, required=True, help="Status is required"
         )
+        parser.add_argument("from_status", type=str, required=False)
         args = parser.parse_args()
 
-        order = Order.query.get(order_id)
-        if not order:
+        return self.change_status(order_id, args["status"], args["from_status"])
+
+    def change_status(self, order_id, status, from_status=None):
+        try:
+            transition = transition_order_status(order_id, status, from_status)
+        except OrderNotFound:
             return {"message": "Order not found"}, 404
+        except InvalidTransition as e:
+            return {"message": str(e)}, 400
+        except StatusConflict as e:
+            db.session.rollback()
+            return {"message": str(e)}, 409
+        db.session.commit()
+
+        publish_order_status(
+            order_id, transition.branch_id, transition.old_status, status
+        )
+        publish_stock_changes(transition.stock_changes)
+        return {"message": "Order status updated successfully"}
 
-        old_status = order.status
-        order.status = args["status"]
+
+ORDER_STATUS_BATCH_LIMIT = 500
+
+
+class OrderStatusBatchResource(Resource):
+    @jwt_required()
+    def put(self):
+        current_user = User.query.get(get_jwt_identity())
+        if not current_user or current_user.role not in STAFF_ROLES:
+            return {"message": "Only staff can update order statuses"}, 403
+
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return {"message": "Request body must be a JSON object"}, 400
+        order_ids = data.get("order_ids")
+        status = data.get("status")
+        if not status or not isinstance(order_ids, list) or not order_ids:
+            return {"message": "A status and a non-empty list of order_ids are required"}, 400
+        if not all(isinstance(order_id, int) for order_id in order_ids):
+            return {"message": "order_ids must be integers"}, 400
+        if len(order_ids) > ORDER_STATUS_BATCH_LIMIT:
+            return {
+                "message": f"At most {ORDER_STATUS_BATCH_LIMIT} orders can be updated at once"
+            }, 400
+
+        try:
+            applied, skipped, stock_changes = transition_many(set(order_ids), status)
+        except InvalidTransition as e:
+            return {"message": str(e)}, 400
         db.session.commit()
 
-        socketio.emit(
-            "order_status_update",
-            {
-                "order_id": order_id,
-                "old_status": old_status,
-                "new_status": order.status,
-            },
-            namespace="/order",
+        for order_id, branch_id, old_status in applied:
+            publish_order_status(order_id, branch_id, old_status, status)
+        publish_stock_changes(stock_changes)
+
+        return {
+            "updated": sorted(order_id for order_id, _, _ in applied),
+            "skipped": [
+                {"order_id": order_id, "reason": reason}
+                for order_id, reason in sorted(skipped.items())
+            ],
+        }
+
+
+def claim_order_payment(order_id):
+    """
+    Marks the order's payment as requested, once. Only a Pending order with
+    no earlier attempt and no completed M-Pesa payment can be claimed, so a
+    re-delivered job or a cancelled order never triggers another STK push.
+    Retrying a failed payment clears the attempt. The claim is committed
+    before Daraja is called.
+    """
+    not_paid = ~exists().where(
+        MpesaTransaction.order_id == order_id,
+        MpesaTransaction.mpesa_receipt_number.isnot(None),
+    )
+    claimed = db.session.execute(
+        update(Order)
+        .where(
+            Order.id == order_id,
+            Order.status == "Pending",
+            Order.payment_requested_at.is_(None),
+            not_paid,
         )
+        .values(payment_requested_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return bool(claimed)
+
+
+def settle_order_payment(order_id, new_status):
+    try:
+        transition = transition_order_status(order_id, new_status, "Pending")
+    except (InvalidTransition, StatusConflict) as e:
+        db.session.rollback()
+        current_app.logger.warning(f"Could not mark order {order_id} as {new_status}: {e}")
+        return
+    db.session.commit()
+    publish_order_status(order_id, transition.branch_id, transition.old_status, new_status)
+
+
+@job_handler("order_payment")
+def process_order_payment(payload):
+    order_id = payload["order_id"]
+    if not claim_order_payment(order_id):
+        current_app.logger.info(f"Skipping payment for order {order_id}: not payable")
+        return
+    order = Order.query.get(order_id)
+    amount = order.total_amount
+
+    # Nothing past the claim raises: a job retry would be skipped anyway, and
+    # the STK push itself must never be sent twice.
+    try:
+        if not payload["simulate"]:
+            # Fetched up front so an OAuth failure is known to be before the push.
+            get_mpesa_access_token()
+    except Exception as e:
+        current_app.logger.error(f"Payment for order {order_id} was not sent: {e}")
+        settle_order_payment(order_id, "Payment Failed")
+        return
+    try:
+        payment_response = initiate_mpesa_transaction(
+            order.phone_number, amount, order.id, simulate=payload["simulate"]
+        )
+    except (requests.ConnectionError, DarajaUnavailable) as e:
+        # No connection to Daraja, so the push never reached it.
+        current_app.logger.error(f"Payment for order {order_id} was not sent: {e}")
+        settle_order_payment(order_id, "Payment Failed")
+        return
+    except Exception as e:
+        # Daraja may have accepted it; staff confirm against M-Pesa.
+        current_app.logger.error(f"Payment outcome for order {order_id} unknown: {e}")
+        settle_order_payment(order_id, "Payment Unconfirmed")
+        return
+
+    if payment_response.get("ResponseCode") != "0":
+        current_app.logger.error(
+            f"Payment failed for order {order_id}: {payment_response}"
+        )
+        settle_order_payment(order_id, "Payment Failed")
+        return
 
-        return {"message": "Order status updated successfully"}
+    try:
+        create_mpesa_transaction(
+            payment_response, amount, order.phone_number, order_id=order_id
+        )
+        enqueue_job("order_notifications", {"order_id": order_id})
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(
+            f"Payment for order {order_id} accepted but not recorded: {e} ({payment_response})"
+        )
+
+
+@job_handler("order_notifications")
+def send_order_notifications(payload):
+    order = load_order(payload["order_id"])
+    if not order:
+        return
+
+    resource = OrderResource()
+    forwarding_number = resource.get_forwarding_number(order.id)
+    resource.send_order_confirmation_sms(order, order.phone_number, forwarding_number)
+    resource.send_order_confirmation_email(order, order.user)
 
 
 class OrderItemResource(Resource):
@@ -559,8 +1134,12 @@ class OrderItemResource(Resource):
             order_id=order.id,
             menu_item_id=args["menu_item_id"],
             quantity=args["quantity"],
+            unit_price=menu_item.price,
+            line_total=menu_item.price * args["quantity"],
         )
         db.session.add(order_item)
+        if order.total_amount is not None:
+            order.total_amount += order_item.line_total
         db.session.commit()
 
         return {
@@ -575,6 +1154,9 @@ class OrderItemResource(Resource):
         if not order_item:
             return {"message": "Order item not found"}, 404
 
+        order = order_item.order
+        if order.total_amount is not None and order_item.line_total is not None:
+            order.total_amount -= order_item.line_total
         db.session.delete(order_item)
         db.session.commit()
         return {"message": "Order item deleted successfully"}
@@ -583,6 +1165,7 @@ class OrderItemResource(Resource):
 class ReservationResource(Resource):
 
     @jwt_required()
+    @idempotent
     def post(self):
         parser = reqparse.RequestParser()
         parser.add_argument(
@@ -610,6 +1193,9 @@ class ReservationResource(Resource):
             default=False,
             help="Set to true to simulate M-Pesa transaction",
         )
+        parser.add_argument("branch_id", type=int, required=False)
+        parser.add_argument("party_size", type=int, required=False, default=2)
+        parser.add_argument("duration_minutes", type=int, required=False)
         args = parser.parse_args()
 
         current_user_id = get_jwt_identity()
@@ -626,27 +1212,66 @@ class ReservationResource(Resource):
                 "message": "Invalid date format. Use format: YYYY-MM-DD HH:MM:SS"
             }, 400
 
+        duration = args["duration_minutes"] or current_app.config["RESERVATION_DURATION_MINUTES"]
+        error = validate_stay(args["party_size"], duration)
+        if error:
+            return {"message": error}, 400
+
         reservation_time = reservation_date.time()
 
-        reservation_cost = calculate_reservation_cost(reservation_time)
+        table = find_table(args["branch_id"], args["table_number"])
+        if table is None:
+            return {"message": f"Table {args['table_number']} not found"}, 404
+        if table.seats < args["party_size"]:
+            return {
+                "message": f"Table {table.table_number} seats at most {table.seats}"
+            }, 400
 
-        reservation = Reservation(
-            user_id_reservation=current_user_id,
-            reservation_date=reservation_date,
-            reservation_time=reservation_time,
-            table_number=args["table_number"],
-            phone_number=args["phone_number"],
-            status="Pending",
+        reservation_cost = quote_reservation(
+            args["branch_id"], reservation_date, table.table_type
         )
-        db.session.add(reservation)
-        db.session.commit()
 
-        payment_response = initiate_mpesa_transaction(
-            args["phone_number"],
-            Decimal(reservation_cost),
-            reservation.id,
-            simulate=args["simulate"],
+        ends_at = reservation_date + timedelta(minutes=duration)
+        reservation_id = book_table(
+            {
+                "user_id_reservation": current_user_id,
+                "reservation_date": reservation_date,
+                "reservation_time": reservation_time,
+                "ends_at": ends_at,
+                "duration_minutes": duration,
+                "party_size": args["party_size"],
+                "branch_id": args["branch_id"],
+                "table_number": args["table_number"],
+                "phone_number": args["phone_number"],
+                "status": "Pending",
+            }
         )
+        if reservation_id is None:
+            db.session.rollback()
+            return {
+                "message": f"Table {args['table_number']} is already booked at that time"
+            }, 409
+        db.session.commit()
+        availability_cache.invalidate(
+            args["branch_id"], reservation_date.date(), ends_at.date()
+        )
+        reservation = Reservation.query.get(reservation_id)
+
+        try:
+            if not args["simulate"]:
+                # Fetched up front so an OAuth failure is known to be before the push.
+                get_mpesa_access_token()
+        except Exception as e:
+            return self.payment_not_sent(reservation, e)
+        try:
+            payment_response = initiate_mpesa_transaction(
+                args["phone_number"],
+                reservation_cost,
+                reservation.id,
+                simulate=args["simulate"],
+            )
+        except (requests.ConnectionError, DarajaUnavailable) as e:
+            return self.payment_not_sent(reservation, e)
 
         if args["simulate"]:
             simulate_mpesa_callback(payment_response)
@@ -654,7 +1279,7 @@ class ReservationResource(Resource):
         if payment_response.get("ResponseCode") == "0":
             create_mpesa_transaction(
                 payment_response,
-                Decimal(reservation_cost),
+                reservation_cost,
                 args["phone_number"],
                 reservation_id=reservation.id
             )
@@ -670,15 +1295,37 @@ class ReservationResource(Resource):
             return {
                 "message": "Reservation created and payment initiated successfully",
                 "reservation_id": reservation.id,
-                "reservation_cost": reservation_cost,
+                "reservation_cost": str(reservation_cost),
             }, 201
         else:
+            self.release_reservation(reservation)
             return {
-                "message": "Reservation created but payment failed",
+                "message": "Payment failed, the reservation was cancelled",
                 "reservation_id": reservation.id,
                 "payment_error": payment_response,
             }, 400
 
+    def payment_not_sent(self, reservation, error):
+        # The push never reached Daraja, so free the table straight away.
+        current_app.logger.error(
+            f"Payment for reservation {reservation.id} was not sent: {error}"
+        )
+        self.release_reservation(reservation)
+        return {
+            "message": "Payment could not be started, the reservation was cancelled",
+            "reservation_id": reservation.id,
+        }, 503
+
+    def release_reservation(self, reservation):
+        """Cancels an unpaid booking so the table can be booked again."""
+        reservation.status = "Cancelled"
+        db.session.commit()
+        availability_cache.invalidate(
+            reservation.branch_id,
+            reservation.reservation_date.date(),
+            reservation.ends_at.date(),
+        )
+
     def get_forwarding_number(self, reservation_id):
         mpesa_transaction = MpesaTransaction.query.filter_by(
             reservation_id=reservation_id
@@ -774,24 +1421,281 @@ class ReservationResource(Resource):
             return "Failed to send email"
 
 
-def calculate_reservation_cost(reservation_time):
+def validate_stay(party_size, duration):
+    if party_size is None or party_size < 1:
+        return "party_size must be at least 1"
+    max_duration = current_app.config["RESERVATION_MAX_DURATION_MINUTES"]
+    if not 1 <= duration <= max_duration:
+        return f"duration_minutes must be between 1 and {max_duration}"
+    return None
+
+
+class ReservationAvailabilityResource(Resource):
+    def get(self):
+        parser = reqparse.RequestParser()
+        parser.add_argument(
+            "date", type=str, required=True, location="args",
+            help="Date is required (format: YYYY-MM-DD)",
+        )
+        parser.add_argument("party_size", type=int, default=2, location="args")
+        parser.add_argument("branch_id", type=int, location="args")
+        parser.add_argument("duration", type=int, location="args")
+        args = parser.parse_args()
+
+        try:
+            day = datetime.strptime(args["date"], "%Y-%m-%d").date()
+        except ValueError:
+            return {"message": "Invalid date format. Use format: YYYY-MM-DD"}, 400
+        duration = args["duration"] or current_app.config["RESERVATION_DURATION_MINUTES"]
+        error = validate_stay(args["party_size"], duration)
+        if error:
+            return {"message": error}, 400
+
+        return {
+            "date": day.isoformat(),
+            "branch_id": args["branch_id"],
+            "party_size": args["party_size"],
+            "duration_minutes": duration,
+            "slots": available_slots(args["branch_id"], day, args["party_size"], duration),
+        }
+
+
+RESERVATION_QUOTE_LIMIT = 2000
+
+
+class ReservationQuoteResource(Resource):
+    def post(self):
+        """
+        Prices many candidate slots in one call, e.g. every slot of a 30-day
+        booking calendar, from the compiled pricing table.
+        """
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return {"message": "Request body must be a JSON object"}, 400
+        slots = data.get("slots")
+        branch_id = data.get("branch_id")
+        table_type = data.get("table_type")
+        if branch_id is not None and not isinstance(branch_id, int):
+            return {"message": "branch_id must be an integer"}, 400
+        if table_type is not None and not isinstance(table_type, str):
+            return {"message": "table_type must be a string"}, 400
+        if not isinstance(slots, list) or not slots:
+            return {"message": "A non-empty list of slots is required"}, 400
+        if len(slots) > RESERVATION_QUOTE_LIMIT:
+            return {
+                "message": f"At most {RESERVATION_QUOTE_LIMIT} slots can be quoted at once"
+            }, 400
+
+        pricing = pricing_cache.get()
+        quotes = []
+        for slot in slots:
+            try:
+                starts_at = datetime.strptime(slot, "%Y-%m-%d %H:%M:%S")
+            except (TypeError, ValueError):
+                return {
+                    "message": f"Invalid slot {slot!r}. Use format: YYYY-MM-DD HH:MM:SS"
+                }, 400
+            price = pricing.quote(branch_id, starts_at, table_type)
+            quotes.append({"reservation_date": slot, "price": str(price)})
+
+        return {"branch_id": branch_id, "table_type": table_type, "quotes": quotes}
+
+
+def serialize_rate(rate):
+    return {
+        "id": rate.id,
+        "branch_id": rate.branch_id,
+        "weekday": rate.weekday,
+        "holiday": rate.holiday.isoformat() if rate.holiday else None,
+        "start_hour": rate.start_hour,
+        "end_hour": rate.end_hour,
+        "table_type": rate.table_type,
+        "price": str(rate.price),
+    }
+
+
+class ReservationRateResource(Resource):
+    def get(self):
+        rates = ReservationRate.query.order_by(ReservationRate.id).all()
+        return {"rates": [serialize_rate(rate) for rate in rates]}
+
+    @jwt_required()
+    def post(self):
+        current_user = User.query.get(get_jwt_identity())
+        if not current_user or current_user.role not in STAFF_ROLES:
+            return {"message": "Only staff can manage reservation rates"}, 403
+
+        parser = reqparse.RequestParser()
+        parser.add_argument("price", type=Decimal, required=True, help="Price is required")
+        parser.add_argument("branch_id", type=int)
+        parser.add_argument("weekday", type=int, help="Weekday is 0 (Monday) to 6")
+        parser.add_argument("holiday", type=str, help="Holiday format: YYYY-MM-DD")
+        parser.add_argument("start_hour", type=int, default=0)
+        parser.add_argument("end_hour", type=int, default=24)
+        parser.add_argument("table_type", type=str)
+        args = parser.parse_args()
+
+        if args["price"] < 0:
+            return {"message": "Price cannot be negative"}, 400
+        if args["weekday"] is not None and not 0 <= args["weekday"] <= 6:
+            return {"message": "Weekday must be between 0 (Monday) and 6"}, 400
+        if not 0 <= args["start_hour"] < args["end_hour"] <= 24:
+            return {"message": "Hours must satisfy 0 <= start_hour < end_hour <= 24"}, 400
+        holiday = None
+        if args["holiday"]:
+            if args["weekday"] is not None:
+                return {"message": "A rate applies to a weekday or a holiday, not both"}, 400
+            try:
+                holiday = datetime.strptime(args["holiday"], "%Y-%m-%d").date()
+            except ValueError:
+                return {"message": "Invalid holiday format. Use format: YYYY-MM-DD"}, 400
+
+        rate = ReservationRate(
+            branch_id=args["branch_id"],
+            weekday=args["weekday"],
+            holiday=holiday,
+            start_hour=args["start_hour"],
+            end_hour=args["end_hour"],
+            table_type=args["table_type"],
+            price=args["price"],
+        )
+        db.session.add(rate)
+        db.session.commit()
+        pricing_cache.invalidate()
+
+        return {"message": "Reservation rate created successfully", "rate": serialize_rate(rate)}, 201
+
+    @jwt_required()
+    def delete(self, rate_id):
+        current_user = User.query.get(get_jwt_identity())
+        if not current_user or current_user.role not in STAFF_ROLES:
+            return {"message": "Only staff can manage reservation rates"}, 403
+
+        rate = ReservationRate.query.get(rate_id)
+        if not rate:
+            return {"message": "Reservation rate not found"}, 404
+
+        db.session.delete(rate)
+        db.session.commit()
+        pricing_cache.invalidate()
+        return {"message": "Reservation rate deleted successfully"}
+
+
+def serialize_table(table):
+    return {
+        "branch_id": table.branch_id,
+        "table_number": table.table_number,
+        "seats": table.seats,
+        "table_type": table.table_type,
+    }
+
+
+class DiningTableResource(Resource):
     """
-    Calculate the cost of a reservation based on the time of the reservation.
-    Example pricing logic:
-    - Reservations from 00:00 to 12:00 cost Ksh.3
-    - Reservations from 12:00 to 18:00 cost Ksh.2
-    - Reservations from 18:00 to 23:59 cost Ksh.1
+    A branch's reservable tables; branch_id None is the unbranched
+    restaurant. Until a branch has any, bookings and availability use the
+    default layout from the config.
     """
-    morning_rate = 3
-    afternoon_rate = 2
-    evening_rate = 1
 
-    if reservation_time.hour < 12:
-        return morning_rate
-    elif reservation_time.hour < 18:
-        return afternoon_rate
-    else:
-        return evening_rate
+    def get(self, branch_id=None, table_number=None):
+        tables = DiningTable.query.filter(DiningTable.branch_id == branch_id)
+        if table_number is not None:
+            table = tables.filter_by(table_number=table_number).first()
+            if not table:
+                return {"message": f"Table {table_number} not found"}, 404
+            return serialize_table(table)
+        return {
+            "tables": [
+                serialize_table(table)
+                for table in tables.order_by(DiningTable.table_number)
+            ]
+        }
+
+    @jwt_required()
+    def post(self, branch_id=None, table_number=None):
+        current_user = User.query.get(get_jwt_identity())
+        if not current_user or current_user.role not in STAFF_ROLES:
+            return {"message": "Only staff can manage tables"}, 403
+        if table_number is not None:
+            return {"message": "Create tables on the tables list, not a table"}, 405
+
+        parser = reqparse.RequestParser()
+        parser.add_argument(
+            "table_number", type=int, required=True, help="Table number is required"
+        )
+        parser.add_argument("seats", type=int, required=True, help="Seats are required")
+        parser.add_argument("table_type", type=str, default="standard")
+        args = parser.parse_args()
+
+        if branch_id is not None and not Branch.query.get(branch_id):
+            return {"message": "Branch not found"}, 404
+        if args["table_number"] < 1 or args["seats"] < 1:
+            return {"message": "table_number and seats must be at least 1"}, 400
+        if DiningTable.query.filter(
+            DiningTable.branch_id == branch_id,
+            DiningTable.table_number == args["table_number"],
+        ).first():
+            return {"message": f"Table {args['table_number']} already exists"}, 409
+
+        table = DiningTable(
+            branch_id=branch_id,
+            table_number=args["table_number"],
+            seats=args["seats"],
+            table_type=args["table_type"] or "standard",
+        )
+        db.session.add(table)
+        db.session.commit()
+        pricing_cache.invalidate()
+
+        return {"message": "Table created successfully", "table": serialize_table(table)}, 201
+
+    @jwt_required()
+    def put(self, branch_id=None, table_number=None):
+        current_user = User.query.get(get_jwt_identity())
+        if not current_user or current_user.role not in STAFF_ROLES:
+            return {"message": "Only staff can manage tables"}, 403
+        if table_number is None:
+            return {"message": "Table number is required"}, 400
+
+        parser = reqparse.RequestParser()
+        parser.add_argument("seats", type=int, required=False)
+        parser.add_argument("table_type", type=str, required=False)
+        args = parser.parse_args()
+
+        table = DiningTable.query.filter(
+            DiningTable.branch_id == branch_id, DiningTable.table_number == table_number
+        ).first()
+        if not table:
+            return {"message": f"Table {table_number} not found"}, 404
+        if args["seats"] is not None:
+            if args["seats"] < 1:
+                return {"message": "seats must be at least 1"}, 400
+            table.seats = args["seats"]
+        if args["table_type"]:
+            table.table_type = args["table_type"]
+
+        db.session.commit()
+        pricing_cache.invalidate()
+        return {"message": "Table updated successfully", "table": serialize_table(table)}
+
+    @jwt_required()
+    def delete(self, branch_id=None, table_number=None):
+        current_user = User.query.get(get_jwt_identity())
+        if not current_user or current_user.role not in STAFF_ROLES:
+            return {"message": "Only staff can manage tables"}, 403
+        if table_number is None:
+            return {"message": "Table number is required"}, 400
+
+        table = DiningTable.query.filter(
+            DiningTable.branch_id == branch_id, DiningTable.table_number == table_number
+        ).first()
+        if not table:
+            return {"message": f"Table {table_number} not found"}, 404
+
+        db.session.delete(table)
+        db.session.commit()
+        pricing_cache.invalidate()
+        return {"message": "Table deleted successfully"}
 
 
 class InventoryResource(Resource):
@@ -815,8 +1719,10 @@ class InventoryResource(Resource):
         )
         args = parser.parse_args()
 
-        inventory = Inventory(item_name=args["item_name"], quantity=args["quantity"])
+        inventory = Inventory(item_name=args["item_name"], quantity=0)
         db.session.add(inventory)
+        db.session.flush()
+        apply_stock_deltas([(inventory.id, args["quantity"])], "restock")
         db.session.commit()
 
         return {
@@ -831,18 +1737,13 @@ class InventoryResource(Resource):
         )
         args = parser.parse_args()
 
-        inventory = Inventory.query.get(inventory_id)
-        if not inventory:
+        if not db.session.query(Inventory.id).filter_by(id=inventory_id).scalar():
             return {"message": "Inventory item not found"}, 404
 
-        inventory.quantity = args["quantity"]
+        changes = set_stock_levels([(inventory_id, args["quantity"])], "adjustment")
         db.session.commit()
 
-        socketio.emit(
-            "stock_update",
-            {"inventory_id": inventory_id, "new_quantity": args["quantity"]},
-            namespace="/inventory",
-        )
+        publish_stock_changes(changes)
 
         return {"message": "Inventory item updated successfully"}
 
@@ -851,11 +1752,112 @@ class InventoryResource(Resource):
         if not inventory:
             return {"message": "Inventory item not found"}, 404
 
+        # The ledger is append-only, so an item with stock history stays;
+        # set its quantity to 0 instead.
+        has_history = inventory.compacted_through > 0 or db.session.query(
+            exists().where(InventoryMovement.inventory_id == inventory_id)
+        ).scalar()
+        if has_history:
+            return {
+                "message": "Inventory item has stock history and cannot be deleted"
+            }, 409
+
         db.session.delete(inventory)
         db.session.commit()
         return {"message": "Inventory item deleted successfully"}
 
 
+class InventoryForecastResource(Resource):
+    def get(self):
+        parser = reqparse.RequestParser()
+        parser.add_argument("horizon", type=int, location="args")
+        parser.add_argument("window", type=int, location="args")
+        parser.add_argument("history", type=int, location="args")
+        args = parser.parse_args()
+        for name in ("horizon", "window", "history"):
+            if args[name] is not None and not 1 <= args[name] <= 366:
+                return {"message": f"{name} must be between 1 and 366 days"}, 400
+
+        items = reorder_suggestions(
+            horizon=args["horizon"], window=args["window"], history_days=args["history"]
+        )
+        return {
+            "horizon_days": args["horizon"] or current_app.config["FORECAST_HORIZON_DAYS"],
+            "items": items,
+        }
+
+
+INVENTORY_ADJUSTMENT_LIMIT = 500
+
+
+class InventoryAdjustmentResource(Resource):
+    @jwt_required()
+    def post(self):
+        """
+        Applies a stock-take or a batch of restock/waste adjustments in one
+        transaction. Each item carries either a counted "quantity" or a
+        signed "delta", never both.
+        """
+        current_user = User.query.get(get_jwt_identity())
+        if not current_user or current_user.role not in STAFF_ROLES:
+            return {"message": "Only staff can adjust inventory"}, 403
+
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return {"message": "Request body must be a JSON object"}, 400
+        reason = data.get("reason", "stocktake")
+        items = data.get("items")
+        if reason not in ADJUSTMENT_REASONS:
+            return {"message": f"Unknown adjustment reason: {reason}"}, 400
+        if not isinstance(items, list) or not items:
+            return {"message": "A non-empty list of items is required"}, 400
+        if len(items) > INVENTORY_ADJUSTMENT_LIMIT:
+            return {
+                "message": f"At most {INVENTORY_ADJUSTMENT_LIMIT} items can be adjusted at once"
+            }, 400
+
+        levels, deltas = {}, {}
+        for item in items:
+            inventory_id = item.get("inventory_id") if isinstance(item, dict) else None
+            if not isinstance(inventory_id, int) or inventory_id in levels or inventory_id in deltas:
+                return {"message": "Each item needs a distinct integer inventory_id"}, 400
+            if isinstance(item.get("quantity"), int) and "delta" not in item:
+                if item["quantity"] < 0:
+                    return {"message": f"Counted quantity for {inventory_id} is negative"}, 400
+                levels[inventory_id] = item["quantity"]
+            elif isinstance(item.get("delta"), int) and "quantity" not in item:
+                deltas[inventory_id] = item["delta"]
+            else:
+                return {
+                    "message": f"Item {inventory_id} needs an integer quantity or delta"
+                }, 400
+
+        ids = set(levels) | set(deltas)
+        known = {
+            inventory_id
+            for inventory_id, in db.session.query(Inventory.id).filter(Inventory.id.in_(ids))
+        }
+        missing = sorted(ids - known)
+        if missing:
+            return {"message": "Inventory items not found", "inventory_ids": missing}, 404
+
+        changes = []
+        if levels:
+            changes += set_stock_levels(list(levels.items()), reason)
+        if deltas:
+            changes += apply_stock_deltas(list(deltas.items()), reason)
+        db.session.commit()
+        publish_stock_changes(changes)
+
+        return {
+            "message": "Inventory adjusted successfully",
+            "items": [
+                {"inventory_id": row.id, "quantity": row.quantity}
+                for row in sorted(changes)
+            ],
+        }
+
+
 class LiveChatResource(Resource):
     @jwt_required()
     def post(self):
@@ -8,15 +8,25 @@ from .resources import (
     UserLogin,
     CartResource,
     OrderResource,
+    OrderStatusBatchResource,
     OrderItemResource,
     MenuItemResource,
     ReservationResource,
+    ReservationAvailabilityResource,
+    ReservationQuoteResource,
+    ReservationRateResource,
+    DiningTableResource,
     InventoryResource,
+    InventoryAdjustmentResource,
+    InventoryForecastResource,
     LiveChatResource,
     BranchResource,
-    Menu
+    Menu,
+    MenuSearch,
+    MenuChanges,
+    MenuImport,
 )
-from .mpesa import simulate_mpesa_callback
+from .mpesa import simulate_mpesa_callback, mpesa_token_stats
 import os
 
 
@@ -27,16 +37,26 @@ api.add_resource(HomeResource, "/")
 api.add_resource(UserRegistration, "/register")
 api.add_resource(UserLogin, "/login")
 api.add_resource(Menu, "/menu")
+api.add_resource(MenuSearch, "/menu/search")
+api.add_resource(MenuChanges, "/menu/changes")
+api.add_resource(MenuImport, "/menu/import")
 
 api.add_resource(
     OrderResource, "/orders", "/orders/<int:order_id>", "/orders/<int:order_id>/status"
 )
+api.add_resource(OrderStatusBatchResource, "/orders/status")
 api_bp.add_url_rule(
     "/mpesa/callback",
     "simulate_mpesa_callback",
     simulate_mpesa_callback,
     methods=["POST"],
 )
+api_bp.add_url_rule(
+    "/mpesa/token/stats",
+    "mpesa_token_stats",
+    mpesa_token_stats,
+    methods=["GET"],
+)
 
 
 api.add_resource(
@@ -49,12 +69,26 @@ api.add_resource(
     ReservationResource,
     "/reservations",
 )
+api.add_resource(ReservationAvailabilityResource, "/reservations/availability")
+api.add_resource(ReservationQuoteResource, "/reservations/quotes")
+api.add_resource(
+    ReservationRateResource, "/reservations/rates", "/reservations/rates/<int:rate_id>"
+)
 api.add_resource(InventoryResource, "/inventory", "/inventory/<int:inventory_id>")
+api.add_resource(InventoryAdjustmentResource, "/inventory/adjustments")
+api.add_resource(InventoryForecastResource, "/inventory/forecast")
 api.add_resource(
     CartResource, "/cart", "/cart/<int:menu_item_id>"
 ) 
 api.add_resource(LiveChatResource, "/live_chat")
 api.add_resource(BranchResource, "/branches" ,"/branches/<int:branch_id>")
+api.add_resource(
+    DiningTableResource,
+    "/tables",
+    "/tables/<int:table_number>",
+    "/branches/<int:branch_id>/tables",
+    "/branches/<int:branch_id>/tables/<int:table_number>",
+)
 
 
 # download the SQLite database file.
@@ -106,29 +106,24 @@ with app.app_context():
         role="customer",
         phone_number=254793453221
     )
-    db.session.add(admin)
+    db.session.add_all([admin, customer, staff])
     db.session.commit()
-    print("Added admin user to database")
-    db.session.add(customer)
-    db.session.commit()
-    print("Added user user to database")
-    db.session.add(staff)
-    db.session.commit()
-    print("Added staff user to database")
+    print("Added admin, customer and staff users to database")
     
+    menu_items = []
     for x in range(100):
         category = random.choice(categories)
         image = random.choice(category_images[category])
         
-        menu_item = MenuItem(
+        menu_items.append(MenuItem(
             name = fake.dish(),
             description = fake.dish_description(),
             rating = fake.random_int(min=1, max=5),
             price = fake.random_int(min=50, max=200),
             category = category,
             image_url= image
-        )
-        db.session.add(menu_item)
-        db.session.commit()
-        print("Added menu item to database")
+        ))
+    db.session.add_all(menu_items)
+    db.session.commit()
+    print(f"Added {len(menu_items)} menu items to database")
     print('\033[92m'"Completed database population")
\ No newline at end of file
@@ -25,3 +25,15 @@ def create_mpesa_transaction(
     db.session.add(mpesa_transaction)
     db.session.commit()
     return mpesa_transaction
+
+
+def dialect_insert(model):
+    """
+    Returns an INSERT for the active database dialect, which is what exposes
+    ON CONFLICT (on_conflict_do_update / on_conflict_do_nothing).
+    """
+    if db.engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model.__table__)
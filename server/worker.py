@@ -0,0 +1,23 @@
+import sys
+import os
+import signal
+
+# Add the project directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from server.app import create_app
+from server.jobs import JobWorkerPool
+
+
+if __name__ == "__main__":
+    app = create_app()
+    pool = JobWorkerPool(app).start()
+    print(f"Started {pool.size} job workers")
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: pool.stop_event.set())
+    try:
+        while not pool.stop_event.wait(1):
+            pass
+    except KeyboardInterrupt:
+        pass
+    pool.stop(timeout=30)
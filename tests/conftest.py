@@ -0,0 +1,52 @@
+# tests/conftest.py
+import sys
+
+sys.path.append(".")
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from server.app import create_app, db
+from server.config import Config
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(Config, "SQLALCHEMY_DATABASE_URI", "sqlite://")
+    monkeypatch.setattr(Config, "JWT_SECRET_KEY", "test-secret-key-at-least-32-bytes")
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app):
+    def make(user_id):
+        return {"Authorization": f"Bearer {create_access_token(identity=user_id)}"}
+
+    return make
+
+
+@pytest.fixture
+def query_counter(app):
+    """Counts the SQL statements sent to the database, e.g. during a request."""
+
+    class Counter:
+        count = 0
+
+    def count_query(*args):
+        Counter.count += 1
+
+    event.listen(db.engine, "before_cursor_execute", count_query)
+    yield Counter
+    event.remove(db.engine, "before_cursor_execute", count_query)
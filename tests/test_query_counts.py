@@ -0,0 +1,96 @@
+# tests/test_query_counts.py
+from decimal import Decimal
+
+import pytest
+
+from server.app import db
+from server.models import Cart, CartItem, Inventory, MenuItem, Order, User
+
+SMALL, LARGE = 2, 20
+
+
+@pytest.fixture
+def carts(app):
+    """One user with a SMALL cart and one with a LARGE cart, each line stocked."""
+    menu_item_id = 0
+    for user_id, n_lines in ((1, SMALL), (2, LARGE)):
+        db.session.add(
+            User(
+                id=user_id,
+                firstname="Test",
+                lastname=f"User {user_id}",
+                email=f"user{user_id}@example.com",
+                password="x",
+            )
+        )
+        cart = Cart(user_id=user_id)
+        db.session.add(cart)
+        db.session.flush()
+        for _ in range(n_lines):
+            menu_item_id += 1
+            db.session.add(
+                Inventory(id=menu_item_id, item_name=f"Item {menu_item_id}", quantity=100)
+            )
+            db.session.add(
+                MenuItem(
+                    id=menu_item_id,
+                    name=f"Item {menu_item_id}",
+                    category="Fish",
+                    price=Decimal("10.00"),
+                    inventory_id=menu_item_id,
+                )
+            )
+            db.session.add(
+                CartItem(cart_id=cart.id, menu_item_id=menu_item_id, quantity=2)
+            )
+    db.session.commit()
+    return {SMALL: 1, LARGE: 2}
+
+
+def count_queries(query_counter, send):
+    db.session.expunge_all()
+    query_counter.count = 0
+    response = send()
+    assert response.status_code < 400, response.get_json()
+    return query_counter.count
+
+
+def checkout(client, auth_headers, user_id):
+    # order.phone_number is unique, so each user pays from their own number.
+    return client.post(
+        "/api/orders",
+        json={"phone_number": f"25470000000{user_id}"},
+        headers=auth_headers(user_id),
+    )
+
+
+def test_cart_get_query_count_is_fixed(client, auth_headers, query_counter, carts):
+    counts = [
+        count_queries(
+            query_counter, lambda: client.get("/api/cart", headers=auth_headers(user_id))
+        )
+        for user_id in (carts[SMALL], carts[LARGE])
+    ]
+    assert counts[0] == counts[1]
+
+
+def test_checkout_query_count_is_fixed(client, auth_headers, query_counter, carts):
+    counts = [
+        count_queries(query_counter, lambda: checkout(client, auth_headers, user_id))
+        for user_id in (carts[SMALL], carts[LARGE])
+    ]
+    assert counts[0] == counts[1]
+
+
+def test_order_get_query_count_is_fixed(client, auth_headers, query_counter, carts):
+    counts = []
+    for user_id in (carts[SMALL], carts[LARGE]):
+        headers = auth_headers(user_id)
+        checkout(client, auth_headers, user_id)
+        order_id = db.session.query(Order.id).filter_by(user_id_order=user_id).scalar()
+        counts.append(
+            count_queries(
+                query_counter, lambda: client.get(f"/api/orders/{order_id}", headers=headers)
+            )
+        )
+    assert counts[0] == counts[1]